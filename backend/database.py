@@ -1,42 +1,183 @@
 """SQLite database setup and session management."""
 import os
+from contextvars import ContextVar, Token
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Optional
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import DeclarativeBase, sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy import Engine, create_engine, event, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
+
+from backend.paths import DATA_DIR, DB_PATH
 
-# Data directory: project data/ or user app data
-DATA_DIR = Path(os.environ.get("TASK_LOGGER_DATA", Path(__file__).resolve().parent.parent / "data"))
 DATA_DIR.mkdir(parents=True, exist_ok=True)
-DB_PATH = DATA_DIR / "task_logger.db"
 
-DATABASE_URL = f"sqlite:///{DB_PATH}"
+# Read endpoints run on aiosqlite unless TASK_LOGGER_ASYNC_DB=0, which routes them through
+# the sync engine in the threadpool instead (useful to compare the two in benchmarks).
+ASYNC_DB = os.environ.get("TASK_LOGGER_ASYNC_DB", "1").lower() not in ("0", "false", "no")
+
+# Connection pool and per-connection SQLite pragmas. WAL lets readers run alongside the
+# writer; synchronous=NORMAL is durable across application crashes in WAL mode.
+POOL_SIZE = int(os.environ.get("TASK_LOGGER_POOL_SIZE", "5"))
+MAX_OVERFLOW = int(os.environ.get("TASK_LOGGER_MAX_OVERFLOW", "10"))
+JOURNAL_MODE = os.environ.get("TASK_LOGGER_JOURNAL_MODE", "WAL").upper()
+SYNCHRONOUS = os.environ.get("TASK_LOGGER_SYNCHRONOUS", "NORMAL").upper()
+CACHE_SIZE_KB = int(os.environ.get("TASK_LOGGER_CACHE_SIZE_KB", "16384"))
+MMAP_SIZE = int(os.environ.get("TASK_LOGGER_MMAP_SIZE", str(256 * 1024 * 1024)))
+BUSY_TIMEOUT_MS = int(os.environ.get("TASK_LOGGER_BUSY_TIMEOUT_MS", "5000"))
+
+if JOURNAL_MODE not in ("WAL", "DELETE", "TRUNCATE", "PERSIST", "MEMORY", "OFF"):
+    raise ValueError(f"Unsupported TASK_LOGGER_JOURNAL_MODE: {JOURNAL_MODE}")
+if SYNCHRONOUS not in ("OFF", "NORMAL", "FULL", "EXTRA"):
+    raise ValueError(f"Unsupported TASK_LOGGER_SYNCHRONOUS: {SYNCHRONOUS}")
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+        cursor.execute(f"PRAGMA journal_mode = {JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous = {SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KB}")
+        cursor.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+        cursor.execute("PRAGMA temp_store = MEMORY")
+        # Off by default in SQLite; deleting a task relies on ON DELETE CASCADE
+        cursor.execute("PRAGMA foreign_keys = ON")
+    finally:
+        cursor.close()
+
+
+@dataclass(eq=False)
+class Database:
+    """Sync and async engines, with their session factories, for one SQLite file."""
+
+    name: str
+    path: Path
+    engine: Engine
+    async_engine: AsyncEngine
+    session_factory: sessionmaker
+    async_session_factory: async_sessionmaker
+
+    @classmethod
+    def open(cls, path: Path, name: str = "") -> "Database":
+        engine = create_engine(
+            f"sqlite:///{path}",
+            connect_args={"check_same_thread": False},
+            pool_size=POOL_SIZE,
+            max_overflow=MAX_OVERFLOW,
+            echo=False,
+        )
+        event.listen(engine, "connect", _set_sqlite_pragmas)
+        async_engine = create_async_engine(
+            f"sqlite+aiosqlite:///{path}",
+            pool_size=POOL_SIZE,
+            max_overflow=MAX_OVERFLOW,
+            echo=False,
+        )
+        event.listen(async_engine.sync_engine, "connect", _set_sqlite_pragmas)
+        return cls(
+            name=name,
+            path=path,
+            engine=engine,
+            async_engine=async_engine,
+            session_factory=sessionmaker(autocommit=False, autoflush=False, bind=engine),
+            async_session_factory=async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False),
+        )
+
+    async def dispose(self) -> None:
+        await self.async_engine.dispose()
+        self.engine.dispose()
+
+
+database = Database.open(DB_PATH)
+engine = database.engine
+SessionLocal = database.session_factory
+async_engine = database.async_engine
+AsyncSessionLocal = database.async_session_factory
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
-    echo=False,
-)
+# The database of the request being served: `database` unless multi-tenant mode picked a
+# tenant's file (backend/services/tenants.py). Context variables follow the request into
+# threadpool workers and the writer thread.
+_current: ContextVar[Database] = ContextVar("task_logger_database", default=database)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def current_database() -> Database:
+    return _current.get()
+
+
+def use_database(db: Database) -> Token:
+    """Make `db` the current database; pass the token to reset_database() when done."""
+    return _current.set(db)
+
+
+def reset_database(token: Token) -> None:
+    _current.reset(token)
 
 
 class Base(DeclarativeBase):
     pass
 
 
-def init_db() -> None:
-    """Create all tables."""
+def init_db(bind: Optional[Engine] = None) -> None:
+    """Create missing tables, then upgrade existing ones to the current schema version,
+    in the default database or the one `bind` points at.
+
+    A database already at the current version is left alone without inspecting every
+    table, which keeps startup fast; schema changes therefore always need a migration.
+    """
     from backend import models  # noqa: F401 - register models
-    Base.metadata.create_all(bind=engine)
+    from backend.migrations import SCHEMA_VERSION, get_schema_version, run_migrations
+    bind = bind or engine
+    with bind.connect() as conn:
+        if get_schema_version(conn) == SCHEMA_VERSION:
+            return
+    Base.metadata.create_all(bind=bind)
+    run_migrations(bind)
 
 
 def get_db():
     """Dependency that yields a DB session."""
-    db = SessionLocal()
+    db = current_database().session_factory()
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_read_db():
+    """Dependency for async read endpoints: an AsyncSession, or a sync Session when ASYNC_DB is off.
+    Use fetch_all/fetch_first to run statements on either."""
+    current = current_database()
+    if ASYNC_DB:
+        async with current.async_session_factory() as db:
+            yield db
+    else:
+        db = current.session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+
+async def fetch_all(db: AsyncSession | Session, stmt) -> list:
+    if isinstance(db, AsyncSession):
+        return (await db.execute(stmt)).all()
+    return await run_in_threadpool(lambda: db.execute(stmt).all())
+
+
+async def fetch_first(db: AsyncSession | Session, stmt):
+    if isinstance(db, AsyncSession):
+        return (await db.execute(stmt)).first()
+    return await run_in_threadpool(lambda: db.execute(stmt).first())
+
+
+async def begin_snapshot(db: AsyncSession | Session) -> None:
+    """Open a read transaction so every statement that follows sees the same snapshot.
+    The sqlite3 driver does not BEGIN before SELECTs, so without this each read stands alone.
+    The session's rollback on close ends it."""
+    if isinstance(db, AsyncSession):
+        await db.execute(text("BEGIN"))
+    else:
+        await run_in_threadpool(db.execute, text("BEGIN"))
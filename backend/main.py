@@ -1,16 +1,45 @@
 """FastAPI application: API + serve React static build."""
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+
 import os
+from contextlib import asynccontextmanager
 from pathlib import Path
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.middleware.gzip import GZipMiddleware
+
+from backend.database import async_engine, engine, init_db
+from backend.routers import activities, dashboard, events, health, metrics, settings, tasks
+from backend.services.metrics import MetricsMiddleware, instrument_engine
+from backend.services.static_assets import AssetIndex
+from backend.services.tenants import MULTI_TENANT, TenantMiddleware, tenants
+from backend.services.writer import writer
+
 
-from backend.database import init_db
-from backend.routers import activities, settings, tasks
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Schema check and migrations run here rather than at import, so importing the app
+    # stays cheap and the server only starts answering once the database is ready
+    init_db()
+    if FRONTEND_DIST.exists():
+        static_assets.load()
+    app.state.ready_at = time.perf_counter()
+    app.state.startup_seconds = app.state.ready_at - _IMPORT_STARTED
+    yield
+    await tenants.close_all()
+    writer.stop()
+    await async_engine.dispose()
+    engine.dispose()
 
-app = FastAPI(title="Task Logger", version="0.1.0")
+
+# Compress JSON and exports larger than this; TASK_LOGGER_GZIP=0 turns it off
+GZIP = os.environ.get("TASK_LOGGER_GZIP", "1").lower() not in ("0", "false", "no")
+GZIP_MIN_BYTES = int(os.environ.get("TASK_LOGGER_GZIP_MIN_BYTES", "4096"))
+
+app = FastAPI(title="Task Logger", version="0.1.0", lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:5173", "http://127.0.0.1:5173", "http://localhost:8765", "http://127.0.0.1:8765"],
@@ -18,24 +47,32 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
-
-init_db()
+if GZIP:
+    app.add_middleware(GZipMiddleware, minimum_size=GZIP_MIN_BYTES)
+if MULTI_TENANT:
+    # Inside the metrics middleware, which then times opening a tenant as part of the request
+    app.add_middleware(TenantMiddleware)
+app.add_middleware(MetricsMiddleware)
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
 
 app.include_router(tasks.router)
 app.include_router(activities.router)
+app.include_router(dashboard.router)
 app.include_router(settings.router)
+app.include_router(events.router)
+app.include_router(metrics.router)
+app.include_router(health.router)
 
 # Serve React build; fallback to index.html for SPA routes
 FRONTEND_DIST = Path(__file__).resolve().parent.parent / "frontend" / "dist"
+# Files are read into memory at startup; see backend/services/static_assets.py
+static_assets = AssetIndex(FRONTEND_DIST)
 if FRONTEND_DIST.exists():
-    app.mount("/assets", StaticFiles(directory=FRONTEND_DIST / "assets"), name="assets")
-
-    @app.get("/{full_path:path}")
-    def serve_spa(full_path: str):
-        f = FRONTEND_DIST / full_path
-        if f.is_file():
-            return FileResponse(f)
-        return FileResponse(FRONTEND_DIST / "index.html")
+
+    @app.api_route("/{full_path:path}", methods=["GET", "HEAD"], include_in_schema=False)
+    def serve_spa(full_path: str, request: Request):
+        return static_assets.response(full_path, request.headers)
 else:
     # Dev: no build yet; root can redirect or show message
     @app.get("/")
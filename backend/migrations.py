@@ -0,0 +1,175 @@
+"""Versioned schema migrations for existing SQLite databases.
+
+The schema version lives in SQLite's ``PRAGMA user_version``. ``create_all`` builds
+missing tables on a fresh database; each migration below upgrades an older file in
+place and must also be safe to run against a freshly created schema.
+"""
+from typing import Callable
+
+from sqlalchemy import Connection, Engine
+
+
+def _m001_activity_indexes(conn: Connection) -> None:
+    """Indexes for date-range scans, per-task history and the open-stopwatch lookup."""
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_activities_logged_at_task_id ON activities (logged_at, task_id)"
+    )
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_activities_task_id_logged_at ON activities (task_id, logged_at)"
+    )
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_activities_open ON activities (no_time_assigned) WHERE end_time IS NULL"
+    )
+
+
+def _m002_daily_task_totals(conn: Connection) -> None:
+    """Backfill the daily rollup (the table itself is created by create_all)."""
+    from backend.services.rollup import rebuild_daily_totals
+    rebuild_daily_totals(conn)
+
+
+def _m003_single_running_stopwatch(conn: Connection) -> None:
+    """Keep only the newest open stopwatch, then make a second one impossible with a unique
+    partial index.
+
+    The others are closed as zero-length entries: end_time = start_time (logged_at when
+    there is no start) and 0 minutes. When a stale stopwatch really stopped is unknown, and
+    closing it at the newest one's start would invent days or weeks of logged time.
+    """
+    newest = conn.exec_driver_sql(
+        "SELECT id FROM activities WHERE end_time IS NULL AND no_time_assigned = 0 "
+        "ORDER BY start_time DESC, id DESC LIMIT 1"
+    ).first()
+    if newest is not None:
+        closed = conn.exec_driver_sql(
+            "UPDATE activities SET end_time = COALESCE(start_time, logged_at), duration_minutes = 0 "
+            "WHERE end_time IS NULL AND no_time_assigned = 0 AND id != :id",
+            {"id": newest.id},
+        ).rowcount
+        if closed:
+            from backend.services.rollup import rebuild_daily_totals
+            rebuild_daily_totals(conn)
+    conn.exec_driver_sql(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_activities_running ON activities (no_time_assigned) "
+        "WHERE end_time IS NULL AND no_time_assigned = 0"
+    )
+
+
+_CASCADE_TABLES = {
+    "activities": (
+        """CREATE TABLE activities_new (
+            id INTEGER NOT NULL,
+            task_id INTEGER NOT NULL,
+            start_time DATETIME,
+            end_time DATETIME,
+            duration_minutes INTEGER NOT NULL,
+            logged_at DATETIME NOT NULL,
+            no_time_assigned BOOLEAN NOT NULL,
+            display_time DATETIME,
+            PRIMARY KEY (id),
+            FOREIGN KEY(task_id) REFERENCES tasks (id) ON DELETE CASCADE
+        )""",
+        "id, task_id, start_time, end_time, duration_minutes, logged_at, no_time_assigned, display_time",
+        (
+            "CREATE INDEX ix_activities_logged_at_task_id ON activities (logged_at, task_id)",
+            "CREATE INDEX ix_activities_task_id_logged_at ON activities (task_id, logged_at)",
+            "CREATE INDEX ix_activities_open ON activities (no_time_assigned) WHERE end_time IS NULL",
+            "CREATE UNIQUE INDEX ux_activities_running ON activities (no_time_assigned) "
+            "WHERE end_time IS NULL AND no_time_assigned = 0",
+        ),
+    ),
+    "daily_task_totals": (
+        """CREATE TABLE daily_task_totals_new (
+            day DATE NOT NULL,
+            task_id INTEGER NOT NULL,
+            total_minutes INTEGER NOT NULL,
+            activity_count INTEGER NOT NULL,
+            PRIMARY KEY (day, task_id),
+            FOREIGN KEY(task_id) REFERENCES tasks (id) ON DELETE CASCADE
+        )""",
+        "day, task_id, total_minutes, activity_count",
+        (),
+    ),
+}
+
+
+def _m004_cascade_deletes(conn: Connection) -> None:
+    """Rebuild the tables referencing tasks with ON DELETE CASCADE, so deleting a task
+    removes its activities and rollup rows inside SQLite. SQLite cannot alter a foreign
+    key in place: each table is copied into a new one, which then takes its name. Rows
+    of tasks that no longer exist are dropped; they would fail the new constraint. A
+    table already created with the cascade (the rollup, when create_all made it for m002)
+    is only cleared of such rows."""
+    for table, (create, columns, indexes) in _CASCADE_TABLES.items():
+        foreign_keys = conn.exec_driver_sql(f"PRAGMA foreign_key_list({table})").all()
+        if all(fk.on_delete == "CASCADE" for fk in foreign_keys):
+            conn.exec_driver_sql(f"DELETE FROM {table} WHERE task_id NOT IN (SELECT id FROM tasks)")
+            continue
+        # Left behind by an interrupted run from before migrations were transactional
+        conn.exec_driver_sql(f"DROP TABLE IF EXISTS {table}_new")
+        conn.exec_driver_sql(create)
+        conn.exec_driver_sql(
+            f"INSERT INTO {table}_new ({columns}) SELECT {columns} FROM {table} "
+            "WHERE task_id IN (SELECT id FROM tasks)"
+        )
+        conn.exec_driver_sql(f"DROP TABLE {table}")
+        conn.exec_driver_sql(f"ALTER TABLE {table}_new RENAME TO {table}")
+        for index in indexes:
+            conn.exec_driver_sql(index)
+
+
+def _m005_seed_color_cursor(conn: Connection) -> None:
+    """Start the task color cursor at the current task count, so allocating a color never
+    has to count tasks. Databases that already allocated through the cursor keep it."""
+    conn.exec_driver_sql(
+        "INSERT OR IGNORE INTO settings (key, value) SELECT 'task_color_cursor', COUNT(*) FROM tasks"
+    )
+
+
+# (version, migration) in ascending order; never renumber or edit a released entry
+MIGRATIONS: list[tuple[int, Callable[[Connection], None]]] = [
+    (1, _m001_activity_indexes),
+    (2, _m002_daily_task_totals),
+    (3, _m003_single_running_stopwatch),
+    (4, _m004_cascade_deletes),
+    (5, _m005_seed_color_cursor),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn: Connection) -> int:
+    return int(conn.exec_driver_sql("PRAGMA user_version").scalar() or 0)
+
+
+def run_migrations(engine: Engine) -> int:
+    """Apply every migration newer than the database's user_version. Returns the final version.
+
+    Each migration runs in its own transaction together with its user_version bump, so an
+    interrupted upgrade leaves the database at the last version that fully applied.
+
+    Migrations run with foreign key enforcement off: table rebuilds must not fire ON DELETE
+    actions, and activities orphaned before the constraints were enforced must not stop
+    the migrations that come before the one that drops them (m004).
+    """
+    with engine.connect() as conn:
+        current = get_schema_version(conn)
+        # SQLite ignores this pragma inside a transaction; the driver has none open here
+        conn.exec_driver_sql("PRAGMA foreign_keys = OFF")
+        conn.commit()
+        try:
+            for version, migrate in MIGRATIONS:
+                if version <= current:
+                    continue
+                with conn.begin():
+                    # pysqlite sends no BEGIN before DDL, which would then commit statement
+                    # by statement; open the transaction explicitly so a migration and its
+                    # version bump commit or roll back together
+                    conn.exec_driver_sql("BEGIN IMMEDIATE")
+                    migrate(conn)
+                    conn.exec_driver_sql(f"PRAGMA user_version = {version}")
+                current = version
+        finally:
+            conn.exec_driver_sql("PRAGMA foreign_keys = ON")
+            conn.commit()
+    return current
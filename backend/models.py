@@ -1,7 +1,7 @@
 """SQLAlchemy ORM models."""
 from datetime import datetime
 
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy import Boolean, Column, Date, DateTime, ForeignKey, Index, Integer, String, text
 from sqlalchemy.orm import relationship
 
 from backend.database import Base
@@ -15,14 +15,16 @@ class Task(Base):
     color = Column(String(20), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
 
-    activities = relationship("Activity", back_populates="task", cascade="all, delete-orphan")
+    activities = relationship(
+        "Activity", back_populates="task", cascade="all, delete-orphan", passive_deletes=True
+    )
 
 
 class Activity(Base):
     __tablename__ = "activities"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    task_id = Column(Integer, ForeignKey("tasks.id"), nullable=False)
+    task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False)
     start_time = Column(DateTime, nullable=True)
     end_time = Column(DateTime, nullable=True)
     duration_minutes = Column(Integer, nullable=False)
@@ -32,6 +34,32 @@ class Activity(Base):
 
     task = relationship("Task", back_populates="activities")
 
+    __table_args__ = (
+        # Date-range scans (calendar, list, stats, export) and per-task history
+        Index("ix_activities_logged_at_task_id", "logged_at", "task_id"),
+        Index("ix_activities_task_id_logged_at", "task_id", "logged_at"),
+        # Open stopwatches: only rows with end_time NULL are indexed
+        Index("ix_activities_open", "no_time_assigned", sqlite_where=text("end_time IS NULL")),
+        # At most one running stopwatch: every row this index covers has the same key
+        Index(
+            "ux_activities_running",
+            "no_time_assigned",
+            unique=True,
+            sqlite_where=text("end_time IS NULL AND no_time_assigned = 0"),
+        ),
+    )
+
+
+class DailyTaskTotal(Base):
+    """Per-day, per-task rollup of activities (by UTC date of logged_at), kept in step with writes."""
+
+    __tablename__ = "daily_task_totals"
+
+    day = Column(Date, primary_key=True)
+    task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True)
+    total_minutes = Column(Integer, nullable=False, default=0)
+    activity_count = Column(Integer, nullable=False, default=0)
+
 
 class Setting(Base):
     __tablename__ = "settings"
@@ -0,0 +1,8 @@
+"""Data directory and database file locations. Imports nothing heavy, so the launcher can
+use it without loading SQLAlchemy."""
+import os
+from pathlib import Path
+
+# Data directory: project data/ or user app data
+DATA_DIR = Path(os.environ.get("TASK_LOGGER_DATA", Path(__file__).resolve().parent.parent / "data"))
+DB_PATH = DATA_DIR / "task_logger.db"
@@ -1,64 +1,128 @@
 """Activities API."""
+import base64
 from datetime import datetime, date, timedelta
-from typing import Optional
+from typing import Optional, Union
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import PlainTextResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, delete, func, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func, distinct
 
-from backend.database import get_db
-from backend.models import Activity, Task
+from backend.database import current_database, fetch_all, fetch_first, get_read_db
+from backend.models import Activity, DailyTaskTotal, Task
 from backend.schemas import (
     ActivityCreateManual,
     ActivityCreateStopwatch,
+    ActivityPage,
     ActivityResponse,
     ActivityRunningResponse,
+    ActivitySwitch,
+    ActivitySwitchResponse,
+    AggregateStats,
+    BulkDeleteResult,
+    BulkImportError,
+    BulkImportResult,
+    HeatmapDay,
     StatsByTask,
     StatsTimeSeriesPoint,
 )
+from backend.services import analytics, fast_json, rollup
+from backend.services.changes import record_change
+from backend.services.data_version import conditional_get
+from backend.services.export import EXPORT_FORMATS, iso_utc, render_export
+from backend.services.heatmap import (
+    MAX_HEATMAP_DAYS,
+    heatmap_query,
+    merge_rows,
+    offset_segments,
+    resolve_zone,
+)
+from backend.services.importer import import_activities, manual_activity_fields
+from backend.services.tenants import current_tenant
+
+IMPORT_CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "text/plain": "txt",
+}
 
 router = APIRouter(prefix="/api/activities", tags=["activities"])
 
 
-def _activity_to_response(a: Activity) -> ActivityResponse:
+# Column projection for read paths: one query, plain row tuples, no ORM identity map
+# and no lazy loads of Activity.task.
+ACTIVITY_ROW_COLUMNS = (
+    Activity.id,
+    Activity.task_id,
+    Task.name.label("task_name"),
+    Task.color.label("task_color"),
+    Activity.start_time,
+    Activity.end_time,
+    Activity.duration_minutes,
+    Activity.logged_at,
+    Activity.no_time_assigned,
+    Activity.display_time,
+)
+
+
+def _row_to_response(r) -> ActivityResponse:
     return ActivityResponse(
-        id=a.id,
-        task_id=a.task_id,
-        task_name=a.task.name,
-        task_color=a.task.color,
-        start_time=a.start_time,
-        end_time=a.end_time,
-        duration_minutes=a.duration_minutes,
-        logged_at=a.logged_at,
-        no_time_assigned=a.no_time_assigned,
-        display_time=a.display_time,
+        id=r.id,
+        task_id=r.task_id,
+        task_name=r.task_name,
+        task_color=r.task_color,
+        start_time=r.start_time,
+        end_time=r.end_time,
+        duration_minutes=r.duration_minutes,
+        logged_at=r.logged_at,
+        no_time_assigned=r.no_time_assigned,
+        display_time=r.display_time,
     )
 
 
-@router.get("/running", response_model=Optional[ActivityRunningResponse])
-def get_running_activity(db: Session = Depends(get_db)):
+# What writes get back from INSERT/UPDATE ... RETURNING instead of a refresh SELECT
+ACTIVITY_RETURNING = (
+    Activity.id,
+    Activity.task_id,
+    Activity.start_time,
+    Activity.end_time,
+    Activity.duration_minutes,
+    Activity.logged_at,
+    Activity.no_time_assigned,
+    Activity.display_time,
+)
+
+
+@router.get(
+    "/running",
+    response_model=Optional[ActivityRunningResponse],
+    dependencies=[Depends(conditional_get)],
+)
+async def get_running_activity(db: AsyncSession | Session = Depends(get_read_db)):
     """Return the current open activity (stopwatch started, not stopped), if any."""
-    a = (
-        db.query(Activity)
-        .join(Task)
-        .filter(Activity.end_time.is_(None), Activity.no_time_assigned.is_(False))
-        .first()
+    r = await fetch_first(
+        db,
+        select(Activity.id, Activity.task_id, Task.name, Task.color, Activity.start_time)
+        .join(Task, Activity.task_id == Task.id)
+        .where(Activity.end_time.is_(None), Activity.no_time_assigned.is_(False)),
     )
-    if not a:
+    if not r:
         return None
     return ActivityRunningResponse(
-        id=a.id,
-        task_id=a.task_id,
-        task_name=a.task.name,
-        task_color=a.task.color,
-        start_time=a.start_time,
+        id=r.id,
+        task_id=r.task_id,
+        task_name=r.name,
+        task_color=r.color,
+        start_time=r.start_time,
     )
 
 
-@router.get("/days")
-def list_days_with_activities(
-    db: Session = Depends(get_db),
+@router.get("/days", dependencies=[Depends(conditional_get)])
+async def list_days_with_activities(
+    db: AsyncSession | Session = Depends(get_read_db),
     year: int = Query(...),
     month: int = Query(..., ge=1, le=12),
 ):
@@ -68,26 +132,77 @@ def list_days_with_activities(
         end = datetime(year + 1, 1, 1)
     else:
         end = datetime(year, month + 1, 1)
-    rows = (
-        db.query(distinct(func.date(Activity.logged_at)))
-        .filter(Activity.logged_at >= start, Activity.logged_at < end)
-        .all()
+    rows = await fetch_all(
+        db,
+        select(func.date(Activity.logged_at))
+        .where(Activity.logged_at >= start, Activity.logged_at < end)
+        .distinct(),
     )
     return [r[0].isoformat() if hasattr(r[0], "isoformat") else str(r[0]) for r in rows]
 
 
-@router.get("", response_model=list[ActivityResponse])
-def list_activities(
-    db: Session = Depends(get_db),
+@router.get("/heatmap", response_model=list[HeatmapDay], dependencies=[Depends(conditional_get)])
+async def activity_heatmap(
+    db: AsyncSession | Session = Depends(get_read_db),
+    from_date: date = Query(...),
+    to_date: date = Query(...),
+    tz: Optional[str] = Query(None, description="IANA time zone, e.g. Europe/Berlin"),
+    utc_offset: Optional[int] = Query(None, ge=-840, le=840, description="Minutes east of UTC"),
+):
+    """Per local day totals for days with activity in from_date..to_date (inclusive), in one query.
+    Days are bucketed in `tz` (falling back to `utc_offset` if the zone is unknown), else UTC."""
+    if to_date < from_date:
+        raise HTTPException(status_code=400, detail="to_date must not be before from_date")
+    if (to_date - from_date).days >= MAX_HEATMAP_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range is limited to {MAX_HEATMAP_DAYS} days")
+    try:
+        zone = resolve_zone(tz, utc_offset)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    rows = await fetch_all(db, heatmap_query(offset_segments(zone, from_date, to_date)))
+    return merge_rows(rows)
+
+
+def _encode_cursor(r) -> str:
+    raw = f"{r.logged_at.isoformat()}|{r.id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        logged_at, activity_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(logged_at), int(activity_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@router.get(
+    "",
+    response_model=Union[ActivityPage, list[ActivityResponse]],
+    dependencies=[Depends(conditional_get)],
+)
+async def list_activities(
+    response: Response,
+    db: AsyncSession | Session = Depends(get_read_db),
     day: Optional[date] = Query(None),
     from_date: Optional[date] = Query(None),
     to_date: Optional[date] = Query(None),
     from_datetime: Optional[str] = Query(None),
     to_datetime: Optional[str] = Query(None),
+    limit: int = Query(200, ge=1, le=1000),
+    cursor: Optional[str] = Query(None),
+    all_rows: bool = Query(False, alias="all"),
 ):
-    """List activities, optionally filtered by day or date range.
-    Use from_datetime/to_datetime (ISO) for the day panel so the selected day is in the user's local timezone."""
-    q = db.query(Activity).join(Task).order_by(Activity.logged_at.desc())
+    """List activities newest first, optionally filtered by day or date range.
+    Use from_datetime/to_datetime (ISO) for the day panel so the selected day is in the user's local timezone.
+    Returns a page of `limit` rows keyed on (logged_at, id); pass `next_cursor` back as `cursor` for the
+    next page. all=true returns every matching row as a plain list (used by the day panel)."""
+    q = (
+        select(*ACTIVITY_ROW_COLUMNS)
+        .join(Task, Activity.task_id == Task.id)
+        .order_by(Activity.logged_at.desc(), Activity.id.desc())
+    )
     if from_datetime is not None and to_datetime is not None:
         try:
             start = datetime.fromisoformat(from_datetime.replace("Z", "+00:00"))
@@ -96,51 +211,85 @@ def list_activities(
                 start = start.replace(tzinfo=None)
             if end.tzinfo:
                 end = end.replace(tzinfo=None)
-            q = q.filter(Activity.logged_at >= start, Activity.logged_at < end)
+            q = q.where(Activity.logged_at >= start, Activity.logged_at < end)
         except (ValueError, TypeError):
             pass
     elif day is not None:
         start = datetime.combine(day, datetime.min.time())
         end = start + timedelta(days=1)
-        q = q.filter(Activity.logged_at >= start, Activity.logged_at < end)
+        q = q.where(Activity.logged_at >= start, Activity.logged_at < end)
     if from_date is not None and from_datetime is None:
-        q = q.filter(Activity.logged_at >= datetime.combine(from_date, datetime.min.time()))
+        q = q.where(Activity.logged_at >= datetime.combine(from_date, datetime.min.time()))
     if to_date is not None and to_datetime is None:
         end = datetime.combine(to_date, datetime.min.time()) + timedelta(days=1)
-        q = q.filter(Activity.logged_at < end)
-    activities = q.all()
-    return [_activity_to_response(a) for a in activities]
+        q = q.where(Activity.logged_at < end)
+    if all_rows:
+        rows = await fetch_all(db, q)
+        if fast_json.FAST_JSON:
+            return fast_json.json_response(fast_json.dumps([fast_json.activity_row(r) for r in rows]), response)
+        return [_row_to_response(r) for r in rows]
+    if cursor is not None:
+        after_logged_at, after_id = _decode_cursor(cursor)
+        q = q.where(
+            or_(
+                Activity.logged_at < after_logged_at,
+                and_(Activity.logged_at == after_logged_at, Activity.id < after_id),
+            )
+        )
+    rows = await fetch_all(db, q.limit(limit + 1))
+    next_cursor = _encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    if fast_json.FAST_JSON:
+        page = {"items": [fast_json.activity_row(r) for r in rows[:limit]], "next_cursor": next_cursor}
+        return fast_json.json_response(fast_json.dumps(page), response)
+    return ActivityPage(
+        items=[_row_to_response(r) for r in rows[:limit]],
+        next_cursor=next_cursor,
+    )
 
 
-@router.get("/stats", response_model=list[StatsByTask])
-def stats_by_task(
-    db: Session = Depends(get_db),
+@router.get("/stats", response_model=list[StatsByTask], dependencies=[Depends(conditional_get)])
+async def stats_by_task(
+    response: Response,
+    db: AsyncSession | Session = Depends(get_read_db),
     from_date: Optional[date] = Query(None),
     to_date: Optional[date] = Query(None),
 ):
-    """Total hours per task in the given date range (for histogram)."""
+    """Total hours per task in the given date range (for histogram). Reads the daily rollup."""
     if from_date is None:
         from_date = date.today() - timedelta(days=30)
     if to_date is None:
         to_date = date.today()
-    start_dt = datetime.combine(from_date, datetime.min.time())
-    end_dt = datetime.combine(to_date, datetime.min.time()) + timedelta(days=1)
-    rows = (
-        db.query(
+    stats_cache = current_tenant().stats_cache
+    cached = stats_cache.get("stats", from_date, to_date)
+    if cached is not None:
+        return fast_json.json_response(cached, response) if fast_json.FAST_JSON else cached
+    generation = stats_cache.generation
+    rows = await fetch_all(
+        db,
+        select(
             Task.id,
             Task.name,
             Task.color,
-            func.sum(Activity.duration_minutes).label("total_minutes"),
-        )
-        .join(Activity, Activity.task_id == Task.id)
-        .filter(
-            Activity.logged_at >= start_dt,
-            Activity.logged_at < end_dt,
+            func.sum(DailyTaskTotal.total_minutes).label("total_minutes"),
         )
+        .join(DailyTaskTotal, DailyTaskTotal.task_id == Task.id)
+        .where(DailyTaskTotal.day >= from_date, DailyTaskTotal.day <= to_date)
         .group_by(Task.id, Task.name, Task.color)
-        .all()
+        .order_by(Task.id),
     )
-    return [
+    if fast_json.FAST_JSON:
+        body = fast_json.dumps([
+            {
+                "task_id": r.id,
+                "task_name": r.name,
+                "task_color": r.color,
+                "total_hours": round(r.total_minutes / 60.0, 2),
+            }
+            for r in rows
+        ])
+        stats_cache.put("stats", from_date, to_date, body, generation)
+        return fast_json.json_response(body, response)
+    out = [
         StatsByTask(
             task_id=r.id,
             task_name=r.name,
@@ -149,196 +298,374 @@ def stats_by_task(
         )
         for r in rows
     ]
+    stats_cache.put("stats", from_date, to_date, out, generation)
+    return out
 
 
-@router.get("/stats/time_series", response_model=list[StatsTimeSeriesPoint])
-def stats_time_series(
-    db: Session = Depends(get_db),
+@router.get(
+    "/stats/time_series",
+    response_model=list[StatsTimeSeriesPoint],
+    dependencies=[Depends(conditional_get)],
+)
+async def stats_time_series(
+    response: Response,
+    db: AsyncSession | Session = Depends(get_read_db),
     from_date: Optional[date] = Query(None),
     to_date: Optional[date] = Query(None),
 ):
-    """Daily hours per task for the date range (for line chart)."""
+    """Daily hours per task for the date range (for line chart). Reads the daily rollup."""
     if from_date is None:
         from_date = date.today() - timedelta(days=30)
     if to_date is None:
         to_date = date.today()
-    start_dt = datetime.combine(from_date, datetime.min.time())
-    end_dt = datetime.combine(to_date, datetime.min.time()) + timedelta(days=1)
-    rows = (
-        db.query(
-            func.date(Activity.logged_at).label("d"),
+    stats_cache = current_tenant().stats_cache
+    cached = stats_cache.get("time_series", from_date, to_date)
+    if cached is not None:
+        return fast_json.json_response(cached, response) if fast_json.FAST_JSON else cached
+    generation = stats_cache.generation
+    rows = await fetch_all(
+        db,
+        select(
+            DailyTaskTotal.day.label("d"),
             Task.id,
             Task.name,
             Task.color,
-            func.sum(Activity.duration_minutes).label("total_minutes"),
-        )
-        .join(Task, Activity.task_id == Task.id)
-        .filter(
-            Activity.logged_at >= start_dt,
-            Activity.logged_at < end_dt,
+            DailyTaskTotal.total_minutes,
         )
-        .group_by(func.date(Activity.logged_at), Task.id, Task.name, Task.color)
-        .all()
+        .join(Task, DailyTaskTotal.task_id == Task.id)
+        .where(DailyTaskTotal.day >= from_date, DailyTaskTotal.day <= to_date)
+        .order_by(DailyTaskTotal.day, Task.id),
     )
-    out = []
+    points = []
     for r in rows:
         d = r.d
         if hasattr(d, "isoformat"):
             d_str = d.isoformat()
         else:
             d_str = str(d)
-        out.append(
-            StatsTimeSeriesPoint(
-                date=d_str,
-                task_id=r.id,
-                task_name=r.name,
-                task_color=r.color,
-                hours=round(r.total_minutes / 60.0, 2),
-            )
+        points.append(
+            {
+                "date": d_str,
+                "task_id": r.id,
+                "task_name": r.name,
+                "task_color": r.color,
+                "hours": round(r.total_minutes / 60.0, 2),
+            }
         )
+    if fast_json.FAST_JSON:
+        body = fast_json.dumps(points)
+        stats_cache.put("time_series", from_date, to_date, body, generation)
+        return fast_json.json_response(body, response)
+    out = [StatsTimeSeriesPoint(**p) for p in points]
+    stats_cache.put("time_series", from_date, to_date, out, generation)
     return out
 
 
-@router.get("/export", response_class=PlainTextResponse)
+@router.get("/stats/aggregate", response_model=AggregateStats, dependencies=[Depends(conditional_get)])
+def stats_aggregate(
+    response: Response,
+    granularity: str = Query("day", pattern="^(day|week|month|weekday|hour)$"),
+    from_date: Optional[date] = Query(None),
+    to_date: Optional[date] = Query(None),
+    task_id: Optional[int] = Query(None),
+    window: Optional[int] = Query(None, ge=1, le=366, description="Rolling average window in buckets"),
+    tz: Optional[str] = Query(None, description="IANA time zone, e.g. Europe/Berlin"),
+    utc_offset: Optional[int] = Query(None, ge=-840, le=840, description="Minutes east of UTC"),
+):
+    """Minutes and counts per day, week (from Monday), month, weekday or hour of day over local
+    days from_date..to_date (default: the last 365 days), overall and per task, with a
+    trailing rolling average and percentiles. Served from the in-memory columns of
+    backend/services/analytics.py; needs numpy."""
+    if not analytics.numpy_available():
+        raise HTTPException(status_code=503, detail="Aggregates need numpy: install the analytics extra")
+    if to_date is None:
+        to_date = date.today()
+    if from_date is None:
+        from_date = to_date - timedelta(days=365)
+    if to_date < from_date:
+        raise HTTPException(status_code=400, detail="to_date must not be before from_date")
+    if (to_date - from_date).days >= MAX_HEATMAP_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range is limited to {MAX_HEATMAP_DAYS} days")
+    try:
+        zone = resolve_zone(tz, utc_offset)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    result = analytics.aggregate(current_tenant().columns, granularity, zone, from_date, to_date, task_id, window)
+    if fast_json.FAST_JSON:
+        return fast_json.json_response(fast_json.dumps(result), response)
+    return result
+
+
+@router.get("/stats/cache")
+def stats_cache_counters() -> dict:
+    """Hit/miss counters of the in-process stats cache."""
+    return current_tenant().stats_cache.counters()
+
+
+EXPORT_CHUNK_ROWS = 1000
+
+
+@router.get("/export")
 def export_log(
-    db: Session = Depends(get_db),
     from_date: Optional[date] = Query(None),
     to_date: Optional[date] = Query(None),
-) -> PlainTextResponse:
-    """Export a plain-text log of all days with activity and what was done."""
-    q = db.query(Activity).join(Task).order_by(Activity.logged_at.asc())
+    fmt: str = Query("txt", alias="format", pattern="^(txt|csv|ndjson)$"),
+) -> StreamingResponse:
+    """Export a log of all days with activity and what was done, as txt, csv or ndjson.
+    Rows are fetched and rendered in chunks, so the body streams with constant memory."""
+    stmt = (
+        select(*ACTIVITY_ROW_COLUMNS)
+        .join(Task, Activity.task_id == Task.id)
+        .order_by(Activity.logged_at.asc(), Activity.id.asc())
+    )
     if from_date is not None:
-        q = q.filter(Activity.logged_at >= datetime.combine(from_date, datetime.min.time()))
+        stmt = stmt.where(Activity.logged_at >= datetime.combine(from_date, datetime.min.time()))
     if to_date is not None:
         end = datetime.combine(to_date, datetime.min.time()) + timedelta(days=1)
-        q = q.filter(Activity.logged_at < end)
-    activities = q.all()
-    if not activities:
-        return PlainTextResponse("No activity logged yet.\n")
-
-    lines: list[str] = []
-    current_date: Optional[date] = None
-
-    for a in activities:
-        d = a.logged_at.date()
-        if current_date != d:
-            if current_date is not None:
-                lines.append("")
-            current_date = d
-            lines.append(d.isoformat())
-        start_str = a.start_time.strftime("%H:%M") if a.start_time else "--:--"
-        end_str = a.end_time.strftime("%H:%M") if a.end_time else "--:--"
-        hours = a.duration_minutes // 60
-        mins = a.duration_minutes % 60
-        dur_str = f"{hours}h {mins}m" if hours else f"{mins}m"
-        label = "No time assigned" if a.no_time_assigned else f"{start_str}–{end_str}"
-        lines.append(f"- {a.task.name}: {label} ({dur_str})")
-
-    content = "\n".join(lines) + "\n"
-    filename = "task-log.txt"
+        stmt = stmt.where(Activity.logged_at < end)
+
+    session_factory = current_database().session_factory
+
+    def body():
+        # Own session: the response outlives the request-scoped get_db session
+        with session_factory() as db:
+            result = db.execute(stmt.execution_options(yield_per=EXPORT_CHUNK_ROWS))
+            yield from render_export(result.partitions(), fmt)
+
+    media_type, filename = EXPORT_FORMATS[fmt]
     headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
-    return PlainTextResponse(content, headers=headers)
+    return StreamingResponse(body(), media_type=media_type, headers=headers)
 
 
-@router.post("", response_model=ActivityResponse)
-def create_activity_stopwatch(body: ActivityCreateStopwatch, db: Session = Depends(get_db)):
-    """Start stopwatch: create activity with start_time=now, end_time=null."""
-    task = db.query(Task).filter(Task.id == body.task_id).first()
+def _returned_activity(row, task_name: str, task_color: str) -> ActivityResponse:
+    return ActivityResponse(**row._mapping, task_name=task_name, task_color=task_color)
+
+
+def _task_name_color(db: Session, task_id: int):
+    task = db.execute(select(Task.name, Task.color).where(Task.id == task_id)).first()
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
-    existing = (
-        db.query(Activity)
-        .filter(Activity.end_time.is_(None), Activity.no_time_assigned.is_(False))
-        .first()
-    )
-    if existing:
-        raise HTTPException(
-            status_code=400,
-            detail="A task is already running. Stop it first.",
-        )
-    now = datetime.utcnow()
-    activity = Activity(
-        task_id=body.task_id,
-        start_time=now,
-        end_time=None,
-        duration_minutes=0,
-        logged_at=now,
-        no_time_assigned=False,
-    )
-    db.add(activity)
-    db.commit()
-    db.refresh(activity)
-    return _activity_to_response(activity)
+    return task
+
+
+RUNNING_CONFLICT = "A task is already running. Stop it first."
+
+# The open stopwatch with what its response needs; there is at most one (ux_activities_running)
+_CURRENT_COLUMNS = (
+    Activity.id,
+    Activity.task_id,
+    Activity.start_time,
+    Activity.end_time,
+    Activity.logged_at,
+    Activity.duration_minutes,
+    Task.name,
+    Task.color,
+)
+
+
+def _start_stopwatch(db: Session, task_id: int, task, now: datetime) -> ActivityResponse:
+    """Insert a running activity. The unique partial index rejects a second open stopwatch,
+    including one started concurrently, so there is no check-then-insert window."""
+    try:
+        with db.begin_nested():
+            row = db.execute(
+                insert(Activity)
+                .values(
+                    task_id=task_id,
+                    start_time=now,
+                    end_time=None,
+                    duration_minutes=0,
+                    logged_at=now,
+                    no_time_assigned=False,
+                )
+                .returning(*ACTIVITY_RETURNING)
+            ).one()
+    except IntegrityError:
+        raise HTTPException(status_code=400, detail=RUNNING_CONFLICT)
+    rollup.add_activity(db, row)
+    return _returned_activity(row, task.name, task.color)
+
+
+def _stop(db: Session, current, now: datetime) -> ActivityResponse:
+    duration = int((now - current.start_time).total_seconds() / 60)
+    rollup.apply_delta(db, current.task_id, current.logged_at, duration - current.duration_minutes, 0)
+    row = db.execute(
+        update(Activity)
+        .where(Activity.id == current.id)
+        .values(end_time=now, duration_minutes=duration)
+        .returning(*ACTIVITY_RETURNING)
+    ).one()
+    return _returned_activity(row, current.name, current.color)
+
+
+@router.post("", response_model=ActivityResponse)
+async def create_activity_stopwatch(body: ActivityCreateStopwatch):
+    """Start stopwatch: create activity with start_time=now, end_time=null."""
+
+    def write(db: Session) -> ActivityResponse:
+        task = _task_name_color(db, body.task_id)
+        return _start_stopwatch(db, body.task_id, task, datetime.utcnow())
+
+    response = await current_tenant().writer.run(write)
+    record_change("activity.started", response.model_dump(mode="json"), [response.logged_at.date()])
+    return response
+
+
+@router.post("/switch", response_model=ActivitySwitchResponse)
+async def switch_activity(body: ActivitySwitch):
+    """Stop the running stopwatch, if any, and start one for task_id at the same instant, in
+    one transaction. Switching to the task that is already running changes nothing and
+    returns it as `started`."""
+
+    def write(db: Session) -> tuple[ActivitySwitchResponse, bool]:
+        task = _task_name_color(db, body.task_id)
+        current = db.execute(
+            select(*_CURRENT_COLUMNS)
+            .join(Task, Activity.task_id == Task.id)
+            .where(Activity.end_time.is_(None), Activity.no_time_assigned.is_(False))
+        ).first()
+        if current is not None and current.task_id == body.task_id:
+            row = db.execute(select(*ACTIVITY_RETURNING).where(Activity.id == current.id)).one()
+            return ActivitySwitchResponse(started=_returned_activity(row, task.name, task.color)), False
+        now = datetime.utcnow()
+        stopped = _stop(db, current, now) if current is not None else None
+        return ActivitySwitchResponse(stopped=stopped, started=_start_stopwatch(db, body.task_id, task, now)), True
+
+    result, changed = await current_tenant().writer.run(write)
+    if changed:
+        for event_type, activity in (("activity.stopped", result.stopped), ("activity.started", result.started)):
+            if activity is not None:
+                record_change(event_type, activity.model_dump(mode="json"), [activity.logged_at.date()])
+    return result
 
 
 @router.post("/manual", response_model=ActivityResponse)
-def create_activity_manual(body: ActivityCreateManual, db: Session = Depends(get_db)):
+async def create_activity_manual(body: ActivityCreateManual):
     """Log manually: either start+end time or total time only (no_time_assigned)."""
-    task = db.query(Task).filter(Task.id == body.task_id).first()
-    if not task:
-        raise HTTPException(status_code=404, detail="Task not found")
 
-    logged_at = body.logged_at or datetime.utcnow()
-    if body.start_time is not None and body.end_time is not None:
-        start_time = body.start_time
-        end_time = body.end_time
-        duration = body.duration_minutes if body.duration_minutes is not None else int(
-            (end_time - start_time).total_seconds() / 60
-        )
-        no_time_assigned = False
-        display_time = None
-    elif body.duration_minutes is not None:
-        duration = body.duration_minutes
-        start_time = None
-        end_time = None
-        no_time_assigned = True
-        if isinstance(logged_at, datetime) and (logged_at.hour or logged_at.minute or logged_at.second):
-            display_time = logged_at
-        else:
-            d = logged_at.date() if isinstance(logged_at, datetime) else logged_at
-            display_time = datetime.combine(d, datetime.min.time()).replace(hour=12, minute=0, second=0)
-    else:
-        raise HTTPException(
-            status_code=400,
-            detail="Provide either start_time+end_time+duration_minutes or duration_minutes only.",
-        )
+    def write(db: Session) -> ActivityResponse:
+        task = _task_name_color(db, body.task_id)
+        try:
+            fields = manual_activity_fields(
+                body.start_time, body.end_time, body.duration_minutes, body.logged_at or datetime.utcnow()
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        row = db.execute(
+            insert(Activity).values(task_id=body.task_id, **fields).returning(*ACTIVITY_RETURNING)
+        ).one()
+        rollup.add_activity(db, row)
+        return _returned_activity(row, task.name, task.color)
+
+    response = await current_tenant().writer.run(write)
+    record_change("activity.created", response.model_dump(mode="json"), [response.logged_at.date()])
+    return response
+
 
-    activity = Activity(
-        task_id=body.task_id,
-        start_time=start_time,
-        end_time=end_time,
-        duration_minutes=duration,
-        logged_at=logged_at,
-        no_time_assigned=no_time_assigned,
-        display_time=display_time,
+@router.post("/bulk", response_model=BulkImportResult)
+async def import_activities_bulk(
+    request: Request,
+    fmt: Optional[str] = Query(None, alias="format", pattern="^(csv|ndjson|txt)$"),
+):
+    """Import many activities in one transaction from CSV, NDJSON or the txt export format.
+    The format comes from ?format= or the Content-Type. Unknown task names are created;
+    rows that cannot be parsed are skipped and reported with their line number."""
+    if fmt is None:
+        content_type = request.headers.get("content-type", "").split(";")[0].strip()
+        fmt = IMPORT_CONTENT_TYPES.get(content_type)
+        if fmt is None:
+            raise HTTPException(status_code=415, detail="Pass ?format=csv|ndjson|txt or a matching Content-Type")
+    text = (await request.body()).decode("utf-8-sig")
+
+    result = await current_tenant().writer.run(lambda db: import_activities(db, text, fmt))
+    if result.imported or result.created_tasks:
+        record_change(
+            "activities.imported",
+            {"imported": result.imported, "created_tasks": result.created_tasks},
+            result.days,
+        )
+    return BulkImportResult(
+        imported=result.imported,
+        created_tasks=result.created_tasks,
+        errors=[BulkImportError(**e) for e in result.errors],
     )
-    db.add(activity)
-    db.commit()
-    db.refresh(activity)
-    return _activity_to_response(activity)
 
 
 @router.patch("/{activity_id}", response_model=ActivityResponse)
-def stop_activity(activity_id: int, db: Session = Depends(get_db)):
+async def stop_activity(activity_id: int):
     """Set end_time=now for a running activity (stop stopwatch)."""
-    activity = db.query(Activity).filter(Activity.id == activity_id).first()
-    if not activity:
-        raise HTTPException(status_code=404, detail="Activity not found")
-    if activity.end_time is not None:
-        raise HTTPException(status_code=400, detail="Activity is already stopped")
-    now = datetime.utcnow()
-    activity.end_time = now
-    activity.duration_minutes = int((now - activity.start_time).total_seconds() / 60)
-    db.commit()
-    db.refresh(activity)
-    return _activity_to_response(activity)
+
+    def write(db: Session) -> ActivityResponse:
+        current = db.execute(
+            select(*_CURRENT_COLUMNS).join(Task, Activity.task_id == Task.id).where(Activity.id == activity_id)
+        ).first()
+        if not current:
+            raise HTTPException(status_code=404, detail="Activity not found")
+        if current.end_time is not None:
+            raise HTTPException(status_code=400, detail="Activity is already stopped")
+        return _stop(db, current, datetime.utcnow())
+
+    response = await current_tenant().writer.run(write)
+    record_change("activity.stopped", response.model_dump(mode="json"), [response.logged_at.date()])
+    return response
+
+
+@router.delete("", response_model=BulkDeleteResult)
+async def delete_activities(
+    from_date: Optional[date] = Query(None),
+    to_date: Optional[date] = Query(None),
+    task_id: Optional[int] = Query(None),
+) -> BulkDeleteResult:
+    """Delete every activity logged from_date..to_date (UTC dates, inclusive, either end
+    optional) and/or of one task, in a single statement. At least one filter is required.
+    Returns how many activities were deleted."""
+    if from_date is None and to_date is None and task_id is None:
+        raise HTTPException(status_code=400, detail="Give from_date, to_date or task_id")
+    if from_date is not None and to_date is not None and from_date > to_date:
+        raise HTTPException(status_code=400, detail="from_date is after to_date")
+    where = []
+    if from_date is not None:
+        where.append(Activity.logged_at >= datetime.combine(from_date, datetime.min.time()))
+    if to_date is not None:
+        where.append(Activity.logged_at < datetime.combine(to_date, datetime.min.time()) + timedelta(days=1))
+    if task_id is not None:
+        where.append(Activity.task_id == task_id)
+
+    def write(db: Session) -> tuple[int, list[date]]:
+        if task_id is not None and db.scalar(select(Task.id).where(Task.id == task_id)) is None:
+            raise HTTPException(status_code=404, detail="Task not found")
+        # Cached stats are read from the rollup, so its buckets are the days to invalidate;
+        # the delete itself does not depend on them, in case the rollup has drifted
+        days = rollup.remove_activities(db, *where)
+        return db.execute(delete(Activity).where(*where)).rowcount, days
+
+    deleted, days = await current_tenant().writer.run(write)
+    if deleted:
+        event = {
+            "from_date": from_date and from_date.isoformat(),
+            "to_date": to_date and to_date.isoformat(),
+            "task_id": task_id,
+            "deleted": deleted,
+        }
+        record_change("activities.deleted", event, days)
+    return BulkDeleteResult(deleted=deleted)
 
 
 @router.delete("/{activity_id}", status_code=204)
-def delete_activity(activity_id: int, db: Session = Depends(get_db)):
+async def delete_activity(activity_id: int):
     """Delete a logged activity (e.g. from the calendar day view)."""
-    activity = db.query(Activity).filter(Activity.id == activity_id).first()
-    if not activity:
-        raise HTTPException(status_code=404, detail="Activity not found")
-    db.delete(activity)
-    db.commit()
+
+    def write(db: Session):
+        row = db.execute(
+            delete(Activity)
+            .where(Activity.id == activity_id)
+            .returning(Activity.id, Activity.task_id, Activity.logged_at, Activity.duration_minutes)
+        ).first()
+        if not row:
+            raise HTTPException(status_code=404, detail="Activity not found")
+        rollup.remove_activity(db, row)
+        return row
+
+    row = await current_tenant().writer.run(write)
+    event = {"id": row.id, "task_id": row.task_id, "logged_at": iso_utc(row.logged_at)}
+    record_change("activity.deleted", event, [row.logged_at.date()])
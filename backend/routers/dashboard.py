@@ -0,0 +1,171 @@
+"""Dashboard API: everything the Activity tab shows, in one request."""
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from backend.database import begin_snapshot, fetch_all, get_read_db
+from backend.models import Activity, DailyTaskTotal, Task
+from backend.routers.activities import ACTIVITY_ROW_COLUMNS
+from backend.schemas import DashboardResponse
+from backend.services import fast_json
+from backend.services.data_version import conditional_get
+from backend.services.heatmap import (
+    MAX_HEATMAP_DAYS,
+    heatmap_query,
+    merge_rows,
+    offset_segments,
+    resolve_zone,
+)
+
+DASHBOARD_FIELDS = ("days", "activities", "stats", "time_series")
+
+router = APIRouter(prefix="/api/dashboard", tags=["dashboard"])
+
+
+def _parse_fields(fields: Optional[str]) -> set[str]:
+    if fields is None:
+        return set(DASHBOARD_FIELDS)
+    selected = {f.strip() for f in fields.split(",") if f.strip()}
+    unknown = selected.difference(DASHBOARD_FIELDS)
+    if unknown or not selected:
+        raise HTTPException(
+            status_code=400,
+            detail=f"fields must be a comma-separated subset of {', '.join(DASHBOARD_FIELDS)}",
+        )
+    return selected
+
+
+def _parse_naive_utc(value: str, name: str) -> datetime:
+    try:
+        dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {name}")
+    if dt.tzinfo:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+def _rollup_pass(rows) -> tuple[list[dict], list[dict]]:
+    """Per-task totals and per-day points from one (day, task) rollup scan ordered by
+    day then task, matching /api/activities/stats and /stats/time_series."""
+    totals: dict[int, dict] = {}
+    points = []
+    for r in rows:
+        d = r.d.isoformat() if hasattr(r.d, "isoformat") else str(r.d)
+        points.append(
+            {
+                "date": d,
+                "task_id": r.id,
+                "task_name": r.name,
+                "task_color": r.color,
+                "hours": round(r.total_minutes / 60.0, 2),
+            }
+        )
+        entry = totals.setdefault(r.id, {"task_id": r.id, "task_name": r.name, "task_color": r.color, "minutes": 0})
+        entry["minutes"] += r.total_minutes
+    stats = [
+        {
+            "task_id": t["task_id"],
+            "task_name": t["task_name"],
+            "task_color": t["task_color"],
+            "total_hours": round(t["minutes"] / 60.0, 2),
+        }
+        for _, t in sorted(totals.items())
+    ]
+    return stats, points
+
+
+@router.get(
+    "",
+    response_model=DashboardResponse,
+    response_model_exclude_unset=True,
+    dependencies=[Depends(conditional_get)],
+)
+async def get_dashboard(
+    response: Response,
+    db: AsyncSession | Session = Depends(get_read_db),
+    fields: Optional[str] = Query(None, description="Comma-separated: days,activities,stats,time_series"),
+    from_date: Optional[date] = Query(None),
+    to_date: Optional[date] = Query(None),
+    days_from: Optional[date] = Query(None),
+    days_to: Optional[date] = Query(None),
+    tz: Optional[str] = Query(None, description="IANA time zone for days, e.g. Europe/Berlin"),
+    utc_offset: Optional[int] = Query(None, ge=-840, le=840, description="Minutes east of UTC"),
+    from_datetime: Optional[str] = Query(None),
+    to_datetime: Optional[str] = Query(None),
+):
+    """Calendar days, activities, per-task stats and the daily time series in one response.
+    stats and time_series cover from_date..to_date (default: the last 30 days) and come from
+    one scan of the daily rollup. days is the heatmap for days_from..days_to (default: the
+    same range) in `tz`/`utc_offset`, as /api/activities/heatmap. activities lists
+    from_datetime..to_datetime (ISO), else the whole date range, newest first.
+    All parts are read in one transaction, so they agree with each other."""
+    selected = _parse_fields(fields)
+    if from_date is None:
+        from_date = date.today() - timedelta(days=30)
+    if to_date is None:
+        to_date = date.today()
+    if to_date < from_date:
+        raise HTTPException(status_code=400, detail="to_date must not be before from_date")
+
+    days_query = None
+    if "days" in selected:
+        days_from = days_from or from_date
+        days_to = days_to or to_date
+        if days_to < days_from:
+            raise HTTPException(status_code=400, detail="days_to must not be before days_from")
+        if (days_to - days_from).days >= MAX_HEATMAP_DAYS:
+            raise HTTPException(status_code=400, detail=f"Range is limited to {MAX_HEATMAP_DAYS} days")
+        try:
+            zone = resolve_zone(tz, utc_offset)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        days_query = heatmap_query(offset_segments(zone, days_from, days_to))
+
+    activities_query = None
+    if "activities" in selected:
+        if from_datetime is not None and to_datetime is not None:
+            start = _parse_naive_utc(from_datetime, "from_datetime")
+            end = _parse_naive_utc(to_datetime, "to_datetime")
+        else:
+            start = datetime.combine(from_date, datetime.min.time())
+            end = datetime.combine(to_date, datetime.min.time()) + timedelta(days=1)
+        activities_query = (
+            select(*ACTIVITY_ROW_COLUMNS)
+            .join(Task, Activity.task_id == Task.id)
+            .where(Activity.logged_at >= start, Activity.logged_at < end)
+            .order_by(Activity.logged_at.desc(), Activity.id.desc())
+        )
+
+    out: dict = {}
+    await begin_snapshot(db)
+    if days_query is not None:
+        out["days"] = merge_rows(await fetch_all(db, days_query))
+    if activities_query is not None:
+        out["activities"] = [fast_json.activity_row(r) for r in await fetch_all(db, activities_query)]
+    if "stats" in selected or "time_series" in selected:
+        rows = await fetch_all(
+            db,
+            select(
+                DailyTaskTotal.day.label("d"),
+                Task.id,
+                Task.name,
+                Task.color,
+                DailyTaskTotal.total_minutes,
+            )
+            .join(Task, DailyTaskTotal.task_id == Task.id)
+            .where(DailyTaskTotal.day >= from_date, DailyTaskTotal.day <= to_date)
+            .order_by(DailyTaskTotal.day, Task.id),
+        )
+        stats, points = _rollup_pass(rows)
+        if "stats" in selected:
+            out["stats"] = stats
+        if "time_series" in selected:
+            out["time_series"] = points
+    if fast_json.FAST_JSON:
+        return fast_json.json_response(fast_json.dumps(out), response)
+    return out
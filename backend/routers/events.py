@@ -0,0 +1,38 @@
+"""Server-sent event stream of data changes."""
+import asyncio
+import json
+
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+
+from backend.services.tenants import current_tenant
+
+router = APIRouter(prefix="/api/events", tags=["events"])
+
+KEEPALIVE_SECONDS = 15.0
+
+
+@router.get("")
+async def stream_events(request: Request) -> StreamingResponse:
+    """Stream change events as text/event-stream. Event names: activity.started, activity.stopped,
+    activity.created, activity.deleted, activities.imported, activities.deleted, task.created,
+    task.deleted, resync."""
+
+    hub = current_tenant().hub
+
+    async def body():
+        queue = hub.subscribe()
+        try:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
+        finally:
+            hub.unsubscribe(queue)
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(body(), media_type="text/event-stream", headers=headers)
@@ -0,0 +1,18 @@
+"""Readiness check."""
+import time
+
+from fastapi import APIRouter, Request
+
+router = APIRouter(prefix="/api/health", tags=["health"])
+
+
+@router.get("")
+async def health(request: Request) -> dict:
+    """Answers once startup (schema check and migrations) has finished; the launcher polls
+    this before opening the browser. Does not touch the database."""
+    state = request.app.state
+    return {
+        "status": "ok",
+        "startup_seconds": round(state.startup_seconds, 3),
+        "uptime_seconds": round(time.perf_counter() - state.ready_at, 3),
+    }
@@ -0,0 +1,39 @@
+"""Prometheus metrics."""
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from backend.services.data_version import data_version
+from backend.services.metrics import metrics
+from backend.services.tenants import current_tenant, tenants
+
+router = APIRouter(prefix="/api/metrics", tags=["metrics"])
+
+
+@router.get("", response_class=PlainTextResponse)
+def get_metrics() -> PlainTextResponse:
+    """Request latency, response size and SQL histograms per route, plus cache, event-stream
+    and connection pool gauges, in the Prometheus text format. Gauges are the current
+    tenant's (the shared database's unless the request names one)."""
+    tenant = current_tenant()
+    cache = tenant.stats_cache.counters()
+    gauges = {
+        "task_logger_stats_cache_hits_total": ("Stats cache hits.", cache["hits"]),
+        "task_logger_stats_cache_misses_total": ("Stats cache misses.", cache["misses"]),
+        "task_logger_stats_cache_evictions_total": ("Stats cache LRU evictions.", cache["evictions"]),
+        "task_logger_stats_cache_invalidations_total": (
+            "Stats cache entries dropped by writes.", cache["invalidations"]
+        ),
+        "task_logger_stats_cache_entries": ("Stats cache entries.", cache["size"]),
+        "task_logger_event_subscribers": ("Open /api/events streams.", tenant.hub.subscriber_count),
+        "task_logger_data_version": ("Writes since startup.", data_version.value),
+        "task_logger_analytics_rows": ("Activities held in the analytics columns.", tenant.columns.rows),
+        "task_logger_write_batches_total": ("Write transactions committed by the writer thread.", tenant.writer.batches),
+        "task_logger_write_jobs_total": ("Write requests run by the writer thread.", tenant.writer.jobs),
+        "task_logger_db_pool_checked_out": (
+            "Sync engine connections in use.", tenant.database.engine.pool.checkedout()
+        ),
+        "task_logger_tenants_open": ("Tenant databases open in multi-tenant mode.", len(tenants)),
+        "task_logger_tenants_opened_total": ("Tenant databases opened.", tenants.opened),
+        "task_logger_tenants_evicted_total": ("Tenant databases closed as idle or least recent.", tenants.evicted),
+    }
+    return PlainTextResponse(metrics.render(gauges), media_type="text/plain; version=0.0.4")
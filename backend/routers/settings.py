@@ -1,23 +1,34 @@
 """Settings API."""
 from fastapi import APIRouter, Depends
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from backend.database import get_db
+from backend.database import fetch_all, get_read_db
 from backend.models import Setting
 from backend.schemas import SettingsResponse, SettingsUpdate
+from backend.services.data_version import conditional_get, data_version
+from backend.services.tenants import current_tenant
 
 router = APIRouter(prefix="/api/settings", tags=["settings"])
 
 DEFAULT_HOTKEY = "ctrl+alt+shift+l"
+SETTING_KEYS = ("hotkey", "run_at_startup")
 
 
-def _get_setting(db: Session, key: str, default: str | bool) -> str | bool:
-    row = db.query(Setting).filter(Setting.key == key).first()
-    if not row or row.value is None:
+def _coerce_setting(value: str | None, default: str | bool) -> str | bool:
+    if value is None:
         return default
     if default is True or default is False:
-        return row.value.lower() in ("1", "true", "yes")
-    return row.value
+        return value.lower() in ("1", "true", "yes")
+    return value
+
+
+def _settings_response(values: dict[str, str | None]) -> SettingsResponse:
+    return SettingsResponse(
+        hotkey=str(_coerce_setting(values.get("hotkey"), DEFAULT_HOTKEY)),
+        run_at_startup=bool(_coerce_setting(values.get("run_at_startup"), False)),
+    )
 
 
 def _set_setting(db: Session, key: str, value: str | bool) -> None:
@@ -28,21 +39,25 @@ def _set_setting(db: Session, key: str, value: str | bool) -> None:
         row.value = value
     else:
         db.add(Setting(key=key, value=value))
-    db.commit()
 
 
-@router.get("", response_model=SettingsResponse)
-def get_settings(db: Session = Depends(get_db)) -> SettingsResponse:
-    return SettingsResponse(
-        hotkey=str(_get_setting(db, "hotkey", DEFAULT_HOTKEY)),
-        run_at_startup=bool(_get_setting(db, "run_at_startup", False)),
-    )
+@router.get("", response_model=SettingsResponse, dependencies=[Depends(conditional_get)])
+async def get_settings(db: AsyncSession | Session = Depends(get_read_db)) -> SettingsResponse:
+    rows = await fetch_all(db, select(Setting.key, Setting.value).where(Setting.key.in_(SETTING_KEYS)))
+    return _settings_response({r.key: r.value for r in rows})
 
 
 @router.put("", response_model=SettingsResponse)
-def update_settings(body: SettingsUpdate, db: Session = Depends(get_db)) -> SettingsResponse:
-    if body.hotkey is not None:
-        _set_setting(db, "hotkey", body.hotkey.strip().lower())
-    if body.run_at_startup is not None:
-        _set_setting(db, "run_at_startup", body.run_at_startup)
-    return get_settings(db)
+async def update_settings(body: SettingsUpdate) -> SettingsResponse:
+    def write(db: Session) -> SettingsResponse:
+        if body.hotkey is not None:
+            _set_setting(db, "hotkey", body.hotkey.strip().lower())
+        if body.run_at_startup is not None:
+            _set_setting(db, "run_at_startup", body.run_at_startup)
+        db.flush()
+        rows = db.query(Setting.key, Setting.value).filter(Setting.key.in_(SETTING_KEYS)).all()
+        return _settings_response({r.key: r.value for r in rows})
+
+    response = await current_tenant().writer.run(write)
+    data_version.bump()
+    return response
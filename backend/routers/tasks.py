@@ -1,46 +1,90 @@
 """Tasks API."""
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from backend.database import get_db
+from backend.database import fetch_all, fetch_first, get_read_db
 from backend.models import Task
-from backend.schemas import TaskCreate, TaskResponse
-from backend.services.color import next_task_color
+from backend.schemas import TaskBulkCreate, TaskCreate, TaskResponse
+from backend.services import rollup
+from backend.services.color import allocate_task_colors
+from backend.services.changes import record_change
+from backend.services.data_version import conditional_get
+from backend.services.tenants import current_tenant
 
 router = APIRouter(prefix="/api/tasks", tags=["tasks"])
 
 
-@router.get("", response_model=list[TaskResponse])
-def list_tasks(db: Session = Depends(get_db)) -> list[Task]:
-    return db.query(Task).order_by(Task.name).all()
+TASK_COLUMNS = (Task.id, Task.name, Task.color, Task.created_at)
+
+
+@router.get("", response_model=list[TaskResponse], dependencies=[Depends(conditional_get)])
+async def list_tasks(db: AsyncSession | Session = Depends(get_read_db)) -> list:
+    return await fetch_all(db, select(*TASK_COLUMNS).order_by(Task.name))
 
 
 @router.post("", response_model=TaskResponse)
-def create_task(body: TaskCreate, db: Session = Depends(get_db)) -> Task:
-    existing = db.query(Task).filter(Task.name == body.name.strip()).first()
-    if existing:
-        raise HTTPException(status_code=400, detail="Task with this name already exists")
-    count = db.query(Task).count()
-    color = next_task_color(count)
-    task = Task(name=body.name.strip(), color=color)
-    db.add(task)
-    db.commit()
-    db.refresh(task)
+async def create_task(body: TaskCreate) -> TaskResponse:
+    name = body.name.strip()
+
+    def write(db: Session) -> TaskResponse:
+        if db.scalar(select(Task.id).where(Task.name == name)) is not None:
+            raise HTTPException(status_code=400, detail="Task with this name already exists")
+        row = db.execute(
+            insert(Task).values(name=name, color=allocate_task_colors(db)[0]).returning(*TASK_COLUMNS)
+        ).one()
+        return TaskResponse.model_validate(row)
+
+    task = await current_tenant().writer.run(write)
+    record_change("task.created", task.model_dump(mode="json"))
     return task
 
 
-@router.get("/{task_id}", response_model=TaskResponse)
-def get_task(task_id: int, db: Session = Depends(get_db)) -> Task:
-    task = db.query(Task).filter(Task.id == task_id).first()
+@router.post("/bulk", response_model=list[TaskResponse])
+async def create_tasks_bulk(body: TaskBulkCreate) -> list:
+    """Create several tasks in one transaction. Fails as a whole if any name is invalid or taken."""
+    names = [name.strip() for name in body.names]
+    if any(not name or len(name) > 255 for name in names):
+        raise HTTPException(status_code=400, detail="Task names must be 1-255 characters")
+    if len(set(names)) != len(names):
+        raise HTTPException(status_code=400, detail="Duplicate task names in request")
+
+    def write(db: Session) -> list[TaskResponse]:
+        taken = db.scalars(select(Task.name).where(Task.name.in_(names))).all()
+        if taken:
+            raise HTTPException(status_code=400, detail=f"Tasks already exist: {', '.join(sorted(taken))}")
+        colors = allocate_task_colors(db, len(names))
+        rows = db.execute(
+            insert(Task).returning(*TASK_COLUMNS, sort_by_parameter_order=True),
+            [{"name": name, "color": color} for name, color in zip(names, colors)],
+        ).all()
+        return [TaskResponse.model_validate(row) for row in rows]
+
+    tasks = await current_tenant().writer.run(write)
+    for task in tasks:
+        record_change("task.created", task.model_dump(mode="json"))
+    return tasks
+
+
+@router.get("/{task_id}", response_model=TaskResponse, dependencies=[Depends(conditional_get)])
+async def get_task(task_id: int, db: AsyncSession | Session = Depends(get_read_db)):
+    task = await fetch_first(db, select(*TASK_COLUMNS).where(Task.id == task_id))
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     return task
 
 
 @router.delete("/{task_id}", status_code=204)
-def delete_task(task_id: int, db: Session = Depends(get_db)) -> None:
-    task = db.query(Task).filter(Task.id == task_id).first()
-    if not task:
-        raise HTTPException(status_code=404, detail="Task not found")
-    db.delete(task)
-    db.commit()
+async def delete_task(task_id: int) -> None:
+    """Delete a task; SQLite cascades the delete to its activities and rollup rows."""
+
+    def write(db: Session) -> list:
+        # Read the task's days first: the cascade would drop its rollup rows silently
+        days = rollup.remove_task(db, task_id)
+        if not db.execute(delete(Task).where(Task.id == task_id)).rowcount:
+            raise HTTPException(status_code=404, detail="Task not found")
+        return days
+
+    days = await current_tenant().writer.run(write)
+    record_change("task.deleted", {"id": task_id}, days)
@@ -9,6 +9,10 @@ class TaskCreate(BaseModel):
     name: str = Field(..., min_length=1, max_length=255)
 
 
+class TaskBulkCreate(BaseModel):
+    names: list[str] = Field(..., min_length=1, max_length=1000)
+
+
 class TaskResponse(BaseModel):
     id: int
     name: str
@@ -23,6 +27,10 @@ class ActivityCreateStopwatch(BaseModel):
     task_id: int
 
 
+class ActivitySwitch(BaseModel):
+    task_id: int
+
+
 class ActivityCreateManual(BaseModel):
     task_id: int
     start_time: Optional[datetime] = None
@@ -55,6 +63,16 @@ class ActivityResponse(BaseModel):
         from_attributes = True
 
 
+class ActivitySwitchResponse(BaseModel):
+    stopped: Optional[ActivityResponse] = None  # the stopwatch that was running, if any
+    started: ActivityResponse
+
+
+class ActivityPage(BaseModel):
+    items: list[ActivityResponse]
+    next_cursor: Optional[str] = None
+
+
 class ActivityRunningResponse(BaseModel):
     id: int
     task_id: int
@@ -72,6 +90,21 @@ class ActivityRunningResponse(BaseModel):
         from_attributes = True
 
 
+class BulkImportError(BaseModel):
+    line: int
+    error: str
+
+
+class BulkImportResult(BaseModel):
+    imported: int
+    created_tasks: list[str]
+    errors: list[BulkImportError]
+
+
+class BulkDeleteResult(BaseModel):
+    deleted: int
+
+
 class SettingsResponse(BaseModel):
     hotkey: str
     run_at_startup: bool
@@ -95,3 +128,48 @@ class StatsTimeSeriesPoint(BaseModel):
     task_name: str
     task_color: str
     hours: float
+
+
+class HeatmapDay(BaseModel):
+    date: str  # local YYYY-MM-DD
+    total_minutes: int
+    activity_count: int
+
+
+class DashboardResponse(BaseModel):
+    # Only the fields asked for in ?fields= are present
+    days: Optional[list[HeatmapDay]] = None
+    activities: Optional[list[ActivityResponse]] = None
+    stats: Optional[list[StatsByTask]] = None
+    time_series: Optional[list[StatsTimeSeriesPoint]] = None
+
+
+class AggregateBucket(BaseModel):
+    bucket: str  # YYYY-MM-DD (day, week start), YYYY-MM, Mon..Sun or 00..23
+    total_minutes: int
+    activity_count: int
+    rolling_avg_minutes: Optional[float] = None
+
+
+class AggregateTaskBucket(BaseModel):
+    bucket: str
+    task_id: int
+    total_minutes: int
+    activity_count: int
+
+
+class Percentiles(BaseModel):
+    p50: float
+    p90: float
+    p99: float
+
+
+class AggregateStats(BaseModel):
+    granularity: str
+    from_date: str
+    to_date: str
+    window: Optional[int] = None
+    buckets: list[AggregateBucket]
+    by_task: list[AggregateTaskBucket]
+    bucket_minutes: Optional[Percentiles] = None  # over buckets' total_minutes
+    activity_minutes: Optional[Percentiles] = None  # over single activities with time logged
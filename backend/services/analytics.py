@@ -0,0 +1,288 @@
+"""Columnar copy of the activities table for ad-hoc aggregation with NumPy.
+
+The first aggregate request loads (id, task_id, logged_at, start, duration) into int64
+arrays, with times as UTC epoch seconds. After that the arrays follow writes instead of
+being reloaded: record_change() passes each event to note_change(), and the next request
+applies them. Stopped activities are updated in place, deleted activities and tasks are
+dropped, and new rows are read with `id > max loaded id`. Bucketing, rolling averages and
+percentiles are then vectorized over the arrays, so their cost does not grow with Python
+work per row.
+
+numpy is optional (the analytics extra) and imported on first use, so it adds nothing to
+startup; without it the aggregate endpoint answers 503.
+"""
+import threading
+from functools import lru_cache
+from itertools import chain
+from datetime import date, datetime, timedelta, tzinfo
+from typing import Any, Optional
+
+from sqlalchemy import Engine, func, select
+
+from backend.database import engine
+from backend.models import Activity
+from backend.services.heatmap import offset_segments
+
+GRANULARITIES = ("day", "week", "month", "weekday", "hour")
+# Trailing window, in buckets, of the rolling average; weekday and hour have none
+DEFAULT_WINDOWS = {"day": 7, "week": 4, "month": 3}
+WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+PERCENTILES = (50, 90, 99)
+LOAD_CHUNK_ROWS = 100_000
+
+EPOCH = date(1970, 1, 1)
+EPOCH_DATETIME = datetime(1970, 1, 1)
+COLUMNS = ("id", "task_id", "logged_at", "started_at", "duration")
+
+# Events whose rows are picked up by reading ids above the loaded maximum
+_INSERT_EVENTS = {"activity.started", "activity.created", "activities.imported"}
+_IGNORED_EVENTS = {"task.created"}
+
+
+def numpy_available() -> bool:
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _rows_query(after_id: int):
+    return (
+        select(
+            Activity.id,
+            Activity.task_id,
+            func.unixepoch(Activity.logged_at),
+            func.unixepoch(func.coalesce(Activity.start_time, Activity.logged_at)),
+            Activity.duration_minutes,
+        )
+        .where(Activity.id > after_id)
+        .order_by(Activity.id)
+    )
+
+
+class ActivityColumns:
+    def __init__(self, bind: Engine = engine) -> None:
+        self.bind = bind
+        self._lock = threading.Lock()
+        self._pending_lock = threading.Lock()
+        self._pending: list[tuple[str, Any]] = []
+        # Events are only queued once a load has started; before that there is nothing to update
+        self._tracking = False
+        self._columns: Optional[dict] = None
+        self.loads = 0
+        self.appended = 0
+
+    @property
+    def rows(self) -> int:
+        columns = self._columns
+        return 0 if columns is None else len(columns["id"])
+
+    def note_change(self, event_type: str, data: Any) -> None:
+        """Queue a committed write; applied by the next columns() call. Cheap and numpy-free."""
+        if not self._tracking or event_type in _IGNORED_EVENTS:
+            return
+        with self._pending_lock:
+            self._pending.append((event_type, data))
+
+    def columns(self) -> dict:
+        """The arrays by name (see COLUMNS), loaded or brought up to date first. Arrays are
+        replaced, not resized, so a caller's reference stays consistent."""
+        with self._lock:
+            if self._columns is None:
+                self._load()
+            else:
+                self._apply_pending()
+            return self._columns
+
+    def _drain(self) -> list[tuple[str, Any]]:
+        with self._pending_lock:
+            pending, self._pending = self._pending, []
+        return pending
+
+    def _read(self, after_id: int) -> dict:
+        import numpy as np
+
+        chunks = []
+        with self.bind.connect() as conn:
+            result = conn.execution_options(yield_per=LOAD_CHUNK_ROWS).execute(_rows_query(after_id))
+            for part in result.partitions():
+                # fromiter over the flattened rows; np.array() on Row objects is ~100x slower
+                flat = np.fromiter(chain.from_iterable(part), dtype=np.int64, count=len(part) * len(COLUMNS))
+                chunks.append(flat.reshape(-1, len(COLUMNS)))
+        table = np.concatenate(chunks) if chunks else np.empty((0, len(COLUMNS)), dtype=np.int64)
+        return {name: np.ascontiguousarray(table[:, i]) for i, name in enumerate(COLUMNS)}
+
+    def _load(self) -> None:
+        self._tracking = True
+        # Everything committed before this read is in it; later events are applied next time
+        self._drain()
+        self._columns = self._read(0)
+        self.loads += 1
+
+    def _apply_pending(self) -> None:
+        import numpy as np
+
+        pending = self._drain()
+        if not pending:
+            return
+        columns = self._columns
+        removed_ids, removed_tasks, updates, inserted = [], [], {}, False
+        for event_type, data in pending:
+            if event_type in _INSERT_EVENTS:
+                inserted = True
+            elif event_type == "activity.stopped":
+                updates[data["id"]] = data["duration_minutes"]
+            elif event_type == "activity.deleted":
+                removed_ids.append(data["id"])
+            elif event_type == "task.deleted":
+                removed_tasks.append(data["id"])
+            else:
+                self._load()
+                return
+        # Removals go first: SQLite may hand a deleted maximum id to the next insert
+        if removed_ids or removed_tasks:
+            keep = ~np.isin(columns["id"], removed_ids) & ~np.isin(columns["task_id"], removed_tasks)
+            if not keep.all():
+                columns = {name: values[keep] for name, values in columns.items()}
+        if inserted:
+            after_id = int(columns["id"][-1]) if len(columns["id"]) else 0
+            new = self._read(after_id)
+            if len(new["id"]):
+                columns = {name: np.concatenate((columns[name], new[name])) for name in COLUMNS}
+                self.appended += len(new["id"])
+        if updates:
+            ids = np.fromiter(updates.keys(), dtype=np.int64)
+            positions = np.searchsorted(columns["id"], ids)
+            found = positions < len(columns["id"])
+            found[found] = columns["id"][positions[found]] == ids[found]
+            if found.any():
+                columns = dict(columns, duration=columns["duration"].copy())
+                columns["duration"][positions[found]] = np.fromiter(updates.values(), dtype=np.int64)[found]
+        self._columns = columns
+
+
+activity_columns = ActivityColumns()
+
+# Offset changes only depend on the zone and range; the daily walk costs more than the bucketing
+_segments = lru_cache(maxsize=64)(offset_segments)
+
+
+def _seconds(utc: datetime) -> int:
+    return (utc - EPOCH_DATETIME) // timedelta(seconds=1)
+
+
+def _percentiles(np, values) -> Optional[dict]:
+    if not len(values):
+        return None
+    return {f"p{p}": round(float(v), 2) for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))}
+
+
+def _bucket_labels(np, granularity: str, from_date: date, to_date: date):
+    """(bucket index of each epoch day, labels) for the calendar granularities."""
+    first, last = (from_date - EPOCH).days, (to_date - EPOCH).days
+    if granularity == "day":
+        return (lambda days: days - first), [
+            (from_date + timedelta(days=i)).isoformat() for i in range(last - first + 1)
+        ]
+    if granularity == "week":
+        # Weeks start on Monday; 1970-01-01 was a Thursday
+        first_monday = first - (first + 3) % 7
+        labels = [
+            (EPOCH + timedelta(days=d)).isoformat() for d in range(first_monday, last + 1, 7)
+        ]
+        return (lambda days: (days - (days + 3) % 7 - first_monday) // 7), labels
+    first_month = from_date.year * 12 + from_date.month - 1
+    last_month = to_date.year * 12 + to_date.month - 1
+    labels = [f"{m // 12}-{m % 12 + 1:02d}" for m in range(first_month, last_month + 1)]
+    epoch_month = EPOCH.year * 12
+
+    def index(days):
+        months = days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+        return months + epoch_month - first_month
+
+    return index, labels
+
+
+def aggregate(
+    activities: ActivityColumns,
+    granularity: str,
+    zone: tzinfo,
+    from_date: date,
+    to_date: date,
+    task_id: Optional[int] = None,
+    window: Optional[int] = None,
+) -> dict:
+    """Minutes and activity counts per bucket over the local days from_date..to_date, overall
+    and per task, with a trailing rolling average and percentiles. Calendar buckets (day,
+    week, month) are dense, so empty periods count toward averages and percentiles. hour
+    buckets by the local start time; the others by logged_at, like the calendar."""
+    import numpy as np
+
+    columns = activities.columns()
+    segments = _segments(zone, from_date, to_date)
+    starts = np.array([_seconds(start) for start, _, _ in segments], dtype=np.int64)
+    offsets = np.array([offset * 60 for _, _, offset in segments], dtype=np.int64)
+    lo, hi = _seconds(segments[0][0]), _seconds(segments[-1][1])
+
+    logged_at = columns["logged_at"]
+    mask = (logged_at >= lo) & (logged_at < hi)
+    if task_id is not None:
+        mask &= columns["task_id"] == task_id
+    logged_at = logged_at[mask]
+    duration = columns["duration"][mask]
+    tasks = columns["task_id"][mask]
+
+    if granularity == "hour":
+        started = columns["started_at"][mask]
+        segment = np.clip(np.searchsorted(starts, started, side="right") - 1, 0, len(starts) - 1)
+        index = (started + offsets[segment]) % 86400 // 3600
+        labels = [f"{h:02d}" for h in range(24)]
+    else:
+        days = (logged_at + offsets[np.searchsorted(starts, logged_at, side="right") - 1]) // 86400
+        if granularity == "weekday":
+            index = (days + 3) % 7
+            labels = list(WEEKDAYS)
+        else:
+            to_index, labels = _bucket_labels(np, granularity, from_date, to_date)
+            index = to_index(days)
+    n = len(labels)
+
+    minutes = np.bincount(index, weights=duration, minlength=n).astype(np.int64)
+    counts = np.bincount(index, minlength=n)
+    if window is None:
+        window = DEFAULT_WINDOWS.get(granularity)
+    rolling = [None] * n
+    if window:
+        cumulative = np.concatenate(([0], np.cumsum(minutes)))
+        means = (cumulative[window:] - cumulative[:-window]) / window
+        rolling[window - 1:] = np.round(means, 2).tolist()
+
+    task_ids, task_index = np.unique(tasks, return_inverse=True)
+    n_tasks = len(task_ids)
+    cells = index * n_tasks + task_index
+    task_minutes = np.bincount(cells, weights=duration, minlength=n * n_tasks).astype(np.int64)
+    task_counts = np.bincount(cells, minlength=n * n_tasks)
+    occupied = np.flatnonzero(task_counts)
+    by_task = [
+        {"bucket": labels[b], "task_id": task, "total_minutes": m, "activity_count": c}
+        for b, task, m, c in zip(
+            (occupied // max(n_tasks, 1)).tolist(),
+            task_ids[occupied % max(n_tasks, 1)].tolist(),
+            task_minutes[occupied].tolist(),
+            task_counts[occupied].tolist(),
+        )
+    ]
+    return {
+        "granularity": granularity,
+        "from_date": from_date.isoformat(),
+        "to_date": to_date.isoformat(),
+        "window": window,
+        "buckets": [
+            {"bucket": label, "total_minutes": m, "activity_count": c, "rolling_avg_minutes": r}
+            for label, m, c, r in zip(labels, minutes.tolist(), counts.tolist(), rolling)
+        ],
+        "by_task": by_task,
+        "bucket_minutes": _percentiles(np, minutes),
+        "activity_minutes": _percentiles(np, duration[duration > 0]),
+    }
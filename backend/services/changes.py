@@ -0,0 +1,21 @@
+"""Post-commit fan-out for data changes: data version, caches and the event stream.
+
+Write endpoints call record_change() once their transaction has committed.
+"""
+from datetime import date
+from typing import Any, Iterable
+
+from backend.services.data_version import data_version
+from backend.services.tenants import current_tenant
+
+
+def record_change(event_type: str, data: Any, days: Iterable[date] = ()) -> None:
+    """Bump the data version, drop cached stats covering `days` (UTC activity dates)
+    and publish the event to /api/events subscribers. The analytics columns hear of the
+    change first, so no response tagged with the new version is computed without it.
+    All of it is the current tenant's."""
+    tenant = current_tenant()
+    tenant.columns.note_change(event_type, data)
+    data_version.bump()
+    tenant.stats_cache.invalidate_days(days)
+    tenant.hub.publish(event_type, data)
@@ -1,6 +1,8 @@
 """Assign maximally distinct hues (0-360) and convert to hex for tasks."""
 import colorsys
-from typing import List
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
 
 
 # First 5: 0, 72, 144, 216, 288 (red, yellow, green, blue, purple)
@@ -9,31 +11,39 @@ from typing import List
 INITIAL_HUES = [0, 72, 144, 216, 288]
 SECOND_TIER = [36, 108, 180, 252, 324]
 
+# Settings key holding the index of the next hue to hand out; migration 5 seeds it from
+# the task count of databases that predate it
+COLOR_CURSOR_KEY = "task_color_cursor"
+
+
+def _bit_reverse(value: int, bits: int) -> int:
+    out = 0
+    for _ in range(bits):
+        out = (out << 1) | (value & 1)
+        value >>= 1
+    return out
+
 
-def _next_hues(n: int) -> List[float]:
-    """Generate n evenly spaced hues. First 5, then 5 more, then bisect intervals."""
-    if n <= 5:
-        return INITIAL_HUES[:n]
-    if n <= 10:
-        return (INITIAL_HUES + SECOND_TIER)[:n]
-    # Build list of all slots by repeated bisection
-    slots: List[float] = INITIAL_HUES + SECOND_TIER
-    while len(slots) < n:
-        slots.sort()
-        # Insert midpoint between each consecutive pair
-        new_slots = []
-        for i in range(len(slots)):
-            new_slots.append(slots[i])
-            if i < len(slots) - 1:
-                mid = (slots[i] + slots[i + 1]) / 2
-                new_slots.append(mid)
-            elif len(slots) > 0:
-                mid = (slots[i] + slots[0] + 360) / 2
-                if mid >= 360:
-                    mid -= 360
-                new_slots.append(mid)
-        slots = new_slots
-    return slots[:n]
+def hue_at(index: int) -> float:
+    """Hue of the index-th task color, in closed form.
+
+    Indices 0-9 are the two fixed tiers above. After that, tier t (t = 0, 1, ...) holds
+    10 * 2**t hues at the midpoints of everything before it, spaced 36 / 2**t degrees
+    apart; within a tier, positions are interleaved so consecutive colors stay far apart.
+    """
+    if index < 5:
+        return INITIAL_HUES[index]
+    if index < 10:
+        return SECOND_TIER[index - 5]
+    j = index - 10
+    tier = (j // 10 + 1).bit_length() - 1
+    m = j - 10 * ((1 << tier) - 1)
+    spacing = 36 / (1 << tier)
+    k = m % 10
+    # Same order as the fixed tiers: every other slot first, then the gaps
+    position = 2 * k if k < 5 else 2 * (k - 5) + 1
+    slot = position * (1 << tier) + _bit_reverse(m // 10, tier)
+    return spacing / 2 + spacing * slot
 
 
 def hue_to_hex(hue: float, saturation: float = 0.7, value: float = 0.9) -> str:
@@ -44,5 +54,21 @@ def hue_to_hex(hue: float, saturation: float = 0.7, value: float = 0.9) -> str:
 
 def next_task_color(existing_task_count: int) -> str:
     """Return next distinct color as hex for the (existing_task_count + 1)-th task."""
-    hues = _next_hues(existing_task_count + 1)
-    return hue_to_hex(hues[-1])
+    return hue_to_hex(hue_at(existing_task_count))
+
+
+def allocate_task_colors(db: Session, n: int = 1) -> list[str]:
+    """Reserve the next n colors from the persisted cursor in one atomic upsert.
+
+    The cursor only moves forward, so colors are not reused after a task is deleted and
+    allocation cost does not depend on how many tasks exist: this is the only statement.
+    """
+    end = db.execute(
+        text(
+            "INSERT INTO settings (key, value) VALUES (:key, :n) "
+            "ON CONFLICT (key) DO UPDATE SET value = CAST(value AS INTEGER) + :n "
+            "RETURNING CAST(value AS INTEGER)"
+        ),
+        {"key": COLOR_CURSOR_KEY, "n": n},
+    ).scalar_one()
+    return [next_task_color(index) for index in range(end - n, end)]
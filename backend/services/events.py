@@ -0,0 +1,57 @@
+"""In-process broadcast hub for change events (stopwatch start/stop, activity and task changes).
+
+Routers publish after their transaction commits, from any thread; each subscriber (one per
+open /api/events stream) gets its own bounded asyncio queue on the event loop it lives on.
+A subscriber that falls too far behind is sent a single "resync" event instead of the
+backlog, telling the client to reload its state.
+"""
+import asyncio
+import threading
+from typing import Any
+
+SUBSCRIBER_QUEUE_SIZE = 256
+
+
+class EventHub:
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE) -> None:
+        self._queue_size = queue_size
+        self._subscribers: dict[asyncio.Queue, asyncio.AbstractEventLoop] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self) -> asyncio.Queue:
+        """Register a new subscriber. Must be called from the subscriber's event loop."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self._queue_size)
+        with self._lock:
+            self._subscribers[queue] = asyncio.get_running_loop()
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        with self._lock:
+            self._subscribers.pop(queue, None)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, event_type: str, data: Any) -> None:
+        """Send an event to every subscriber. Safe to call from worker threads."""
+        event = {"type": event_type, "data": data}
+        with self._lock:
+            subscribers = list(self._subscribers.items())
+        for queue, loop in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._deliver, queue, event)
+            except RuntimeError:
+                # Loop already closed: the stream is gone
+                self.unsubscribe(queue)
+
+    @staticmethod
+    def _deliver(queue: asyncio.Queue, event: dict) -> None:
+        if queue.full():
+            while not queue.empty():
+                queue.get_nowait()
+            event = {"type": "resync", "data": None}
+        queue.put_nowait(event)
+
+
+hub = EventHub()
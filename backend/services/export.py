@@ -0,0 +1,118 @@
+"""Render activity rows for the log export as text, CSV or NDJSON chunks.
+
+Rows are consumed in partitions (one per server-side fetch) and each partition is
+rendered to a single string, so memory stays flat no matter how long the history is.
+"""
+import csv
+import io
+import json
+from datetime import date, datetime, timezone
+from typing import Iterable, Iterator, Optional, Sequence
+
+EXPORT_FORMATS = {
+    "txt": ("text/plain; charset=utf-8", "task-log.txt"),
+    "csv": ("text/csv; charset=utf-8", "task-log.csv"),
+    "ndjson": ("application/x-ndjson", "task-log.ndjson"),
+}
+
+CSV_COLUMNS = [
+    "date",
+    "task",
+    "start_time",
+    "end_time",
+    "duration_minutes",
+    "no_time_assigned",
+    "logged_at",
+    "display_time",
+]
+
+EMPTY_TEXT = "No activity logged yet.\n"
+
+
+def iso_utc(dt: Optional[datetime]) -> Optional[str]:
+    """Same format as the API responses: naive datetimes are UTC, suffixed with Z."""
+    if dt is None:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.isoformat().replace("+00:00", "Z")
+
+
+def _duration_label(minutes: int) -> str:
+    hours = minutes // 60
+    mins = minutes % 60
+    return f"{hours}h {mins}m" if hours else f"{mins}m"
+
+
+def _render_txt(partitions: Iterable[Sequence]) -> Iterator[str]:
+    current_date: Optional[date] = None
+    for rows in partitions:
+        lines: list[str] = []
+        for r in rows:
+            d = r.logged_at.date()
+            if current_date != d:
+                if current_date is not None:
+                    lines.append("")
+                current_date = d
+                lines.append(d.isoformat())
+            start_str = r.start_time.strftime("%H:%M") if r.start_time else "--:--"
+            end_str = r.end_time.strftime("%H:%M") if r.end_time else "--:--"
+            label = "No time assigned" if r.no_time_assigned else f"{start_str}–{end_str}"
+            lines.append(f"- {r.task_name}: {label} ({_duration_label(r.duration_minutes)})")
+        if lines:
+            yield "\n".join(lines) + "\n"
+    if current_date is None:
+        yield EMPTY_TEXT
+
+
+def _render_csv(partitions: Iterable[Sequence]) -> Iterator[str]:
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    writer.writerow(CSV_COLUMNS)
+    yield buf.getvalue()
+    for rows in partitions:
+        buf.seek(0)
+        buf.truncate()
+        for r in rows:
+            writer.writerow([
+                r.logged_at.date().isoformat(),
+                r.task_name,
+                iso_utc(r.start_time) or "",
+                iso_utc(r.end_time) or "",
+                r.duration_minutes,
+                "true" if r.no_time_assigned else "false",
+                iso_utc(r.logged_at),
+                iso_utc(r.display_time) or "",
+            ])
+        yield buf.getvalue()
+
+
+def _render_ndjson(partitions: Iterable[Sequence]) -> Iterator[str]:
+    for rows in partitions:
+        yield "".join(
+            json.dumps(
+                {
+                    "id": r.id,
+                    "task_id": r.task_id,
+                    "task_name": r.task_name,
+                    "task_color": r.task_color,
+                    "start_time": iso_utc(r.start_time),
+                    "end_time": iso_utc(r.end_time),
+                    "duration_minutes": r.duration_minutes,
+                    "logged_at": iso_utc(r.logged_at),
+                    "no_time_assigned": bool(r.no_time_assigned),
+                    "display_time": iso_utc(r.display_time),
+                },
+                ensure_ascii=False,
+            )
+            + "\n"
+            for r in rows
+        )
+
+
+_RENDERERS = {"txt": _render_txt, "csv": _render_csv, "ndjson": _render_ndjson}
+
+
+def render_export(partitions: Iterable[Sequence], fmt: str) -> Iterator[str]:
+    """Yield the export body chunk by chunk. Rows need the attributes used by the renderers."""
+    return _RENDERERS[fmt](partitions)
@@ -0,0 +1,53 @@
+"""Direct JSON encoding for large list responses, skipping pydantic models.
+
+List endpoints normally build one response model per row and let FastAPI validate and
+serialize them. The fast path turns row tuples straight into dicts with the same keys,
+order and UTC "Z" datetime format, and encodes them with orjson when it is installed
+(stdlib json otherwise). The output is byte-for-byte the same as the model path.
+Set TASK_LOGGER_FAST_JSON=0 to use the models instead.
+"""
+import json
+import os
+from typing import Any
+
+from fastapi import Response
+
+from backend.services.export import iso_utc
+
+try:
+    import orjson  # optional: the fast-json extra
+except ImportError:
+    orjson = None
+
+FAST_JSON = os.environ.get("TASK_LOGGER_FAST_JSON", "1").lower() not in ("0", "false", "no")
+
+
+def dumps(content: Any) -> bytes:
+    """Compact UTF-8 JSON, matching pydantic's dump_json for plain str/int/float/bool/None.
+    (stdlib json writes tiny floats as 1e-07 rather than 1e-7; rounded hours never are.)"""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def activity_row(r) -> dict:
+    """ActivityResponse as a dict, from an ACTIVITY_ROW_COLUMNS row."""
+    return {
+        "id": r.id,
+        "task_id": r.task_id,
+        "task_name": r.task_name,
+        "task_color": r.task_color,
+        "start_time": iso_utc(r.start_time),
+        "end_time": iso_utc(r.end_time),
+        "duration_minutes": r.duration_minutes,
+        "logged_at": iso_utc(r.logged_at),
+        "no_time_assigned": bool(r.no_time_assigned),
+        "display_time": iso_utc(r.display_time),
+    }
+
+
+def json_response(body: bytes, response: Response) -> Response:
+    """Wrap encoded JSON, keeping headers dependencies set on the endpoint's Response
+    (ETag and Cache-Control from conditional_get), which a returned Response would drop."""
+    headers = {k: v for k, v in response.headers.items() if k != "content-length"}
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,99 @@
+"""Per-day activity totals in the client's local time, for calendar heatmaps.
+
+logged_at is stored as naive UTC, so local days are derived with range arithmetic: the
+local date range is converted to UTC bounds (an index range scan on logged_at), split
+wherever the zone's UTC offset changes, and each constant-offset segment is grouped by
+date(logged_at, '<offset> minutes'). All segments run as one UNION ALL query.
+"""
+from datetime import date, datetime, timedelta, timezone, tzinfo
+from typing import Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from sqlalchemy import func, select, union_all
+
+from backend.models import Activity
+
+# Longest range a single heatmap request may cover
+MAX_HEATMAP_DAYS = 3660
+
+
+def resolve_zone(tz: Optional[str], utc_offset: Optional[int]) -> tzinfo:
+    """IANA zone if given and known, else a fixed offset (minutes east of UTC), else UTC.
+
+    A client sends both so that a server without a time zone database (Windows without
+    the tzdata package) still buckets by its current offset. Raises ValueError when only
+    an unknown zone is given.
+    """
+    if tz:
+        try:
+            return ZoneInfo(tz)
+        except (ZoneInfoNotFoundError, ValueError):
+            if utc_offset is None:
+                raise ValueError(f"Unknown time zone: {tz}")
+    if utc_offset is not None:
+        return timezone(timedelta(minutes=utc_offset))
+    return timezone.utc
+
+
+def _offset_minutes(zone: tzinfo, utc: datetime) -> int:
+    return int(utc.replace(tzinfo=timezone.utc).astimezone(zone).utcoffset().total_seconds() // 60)
+
+
+def _to_utc(zone: tzinfo, local: datetime) -> datetime:
+    return local.replace(tzinfo=zone).astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def offset_segments(zone: tzinfo, from_date: date, to_date: date) -> list[tuple[datetime, datetime, int]]:
+    """(utc_start, utc_end, offset_minutes) spans covering the local days from_date..to_date,
+    each with a constant UTC offset. Transitions are found by a daily walk, then bisected
+    to the second."""
+    lo = _to_utc(zone, datetime.combine(from_date, datetime.min.time()))
+    hi = _to_utc(zone, datetime.combine(to_date + timedelta(days=1), datetime.min.time()))
+    last = hi - timedelta(seconds=1)
+    segments = []
+    start, offset = lo, _offset_minutes(zone, lo)
+    cursor = lo
+    while True:
+        step = min(cursor + timedelta(days=1), last)
+        if _offset_minutes(zone, step) == offset:
+            if step == last:
+                break
+            cursor = step
+            continue
+        a, b = cursor, step
+        while b - a > timedelta(seconds=1):
+            mid = a + timedelta(seconds=(b - a) // timedelta(seconds=2))
+            if _offset_minutes(zone, mid) == offset:
+                a = mid
+            else:
+                b = mid
+        segments.append((start, b, offset))
+        start, offset, cursor = b, _offset_minutes(zone, b), b
+    segments.append((start, hi, offset))
+    return segments
+
+
+def heatmap_query(segments: list[tuple[datetime, datetime, int]]):
+    """One statement returning (local_day, total_minutes, activity_count) rows. A day that
+    spans an offset change appears once per segment; callers merge them."""
+    parts = []
+    for start, end, offset in segments:
+        day = func.date(Activity.logged_at, f"{offset:+d} minutes")
+        parts.append(
+            select(day, func.sum(Activity.duration_minutes), func.count(Activity.id))
+            .where(Activity.logged_at >= start, Activity.logged_at < end)
+            .group_by(day)
+        )
+    return parts[0] if len(parts) == 1 else union_all(*parts)
+
+
+def merge_rows(rows) -> list[dict]:
+    totals: dict[str, list[int]] = {}
+    for day, minutes, count in rows:
+        bucket = totals.setdefault(str(day), [0, 0])
+        bucket[0] += minutes or 0
+        bucket[1] += count
+    return [
+        {"date": day, "total_minutes": minutes, "activity_count": count}
+        for day, (minutes, count) in sorted(totals.items())
+    ]
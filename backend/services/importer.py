@@ -0,0 +1,234 @@
+"""Parse and bulk-insert activity history (CSV, NDJSON or the plain-text export format).
+
+Rows are parsed lazily, task names are resolved through one name -> id map (creating
+missing tasks), and activities are inserted with executemany in large batches inside
+the caller's transaction. Rows that fail to parse are reported, not fatal.
+"""
+import csv
+import io
+import json
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterator, Optional
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from backend.models import Activity, Task
+from backend.services import rollup
+from backend.services.color import allocate_task_colors
+
+IMPORT_FORMATS = ("csv", "ndjson", "txt")
+INSERT_BATCH_SIZE = 5000
+
+# "- Name: 08:00–09:30 (1h 30m)" / "- Name: No time assigned (45m)"
+_TXT_DAY = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+_TXT_ROW = re.compile(
+    r"^- (?P<name>.+): (?:No time assigned|(?P<start>\d\d:\d\d|--:--)–(?P<end>\d\d:\d\d|--:--))"
+    r" \((?:(?P<hours>\d+)h )?(?P<mins>\d+)m\)$"
+)
+
+
+@dataclass
+class ImportResult:
+    imported: int = 0
+    created_tasks: list[str] = field(default_factory=list)
+    errors: list[dict] = field(default_factory=list)
+    days: set[date] = field(default_factory=set)
+
+
+def manual_activity_fields(
+    start_time: Optional[datetime],
+    end_time: Optional[datetime],
+    duration_minutes: Optional[int],
+    logged_at: datetime,
+) -> dict:
+    """Column values for a manually logged activity: start+end, or a duration with no time assigned.
+    Raises ValueError when neither is given."""
+    if start_time is not None and end_time is not None:
+        duration = duration_minutes if duration_minutes is not None else int(
+            (end_time - start_time).total_seconds() / 60
+        )
+        return dict(
+            start_time=start_time,
+            end_time=end_time,
+            duration_minutes=duration,
+            logged_at=logged_at,
+            no_time_assigned=False,
+            display_time=None,
+        )
+    if duration_minutes is not None:
+        if logged_at.hour or logged_at.minute or logged_at.second:
+            display_time = logged_at
+        else:
+            display_time = datetime.combine(logged_at.date(), datetime.min.time()).replace(hour=12)
+        return dict(
+            start_time=None,
+            end_time=None,
+            duration_minutes=duration_minutes,
+            logged_at=logged_at,
+            no_time_assigned=True,
+            display_time=display_time,
+        )
+    raise ValueError("Provide either start_time+end_time+duration_minutes or duration_minutes only.")
+
+
+def _parse_dt(value) -> Optional[datetime]:
+    """ISO datetime -> naive UTC (the storage convention). Empty values are None."""
+    if value is None or value == "":
+        return None
+    dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+def _parse_bool(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "true", "yes")
+
+
+def _record(
+    task_name,
+    start_time=None,
+    end_time=None,
+    duration_minutes=None,
+    logged_at=None,
+    no_time_assigned=None,
+    day=None,
+) -> dict:
+    name = str(task_name or "").strip()
+    if not name:
+        raise ValueError("Missing task name")
+    if len(name) > 255:
+        raise ValueError("Task name is longer than 255 characters")
+    start = _parse_dt(start_time)
+    end = _parse_dt(end_time)
+    duration = int(duration_minutes) if duration_minutes not in (None, "") else None
+    if duration is not None and duration < 0:
+        raise ValueError("duration_minutes must not be negative")
+    logged = _parse_dt(logged_at) or start
+    if logged is None and day:
+        logged = datetime.combine(date.fromisoformat(str(day)), datetime.min.time())
+    if logged is None:
+        raise ValueError("Missing logged_at")
+    if no_time_assigned is not None and _parse_bool(no_time_assigned):
+        start = end = None
+    elif start is not None and end is None:
+        raise ValueError("Running stopwatch rows cannot be imported")
+    fields = manual_activity_fields(start, end, duration, logged)
+    fields["task_name"] = name
+    return fields
+
+
+def _parse_csv(text: str) -> Iterator[tuple[int, dict | Exception]]:
+    reader = csv.DictReader(io.StringIO(text))
+    for row in reader:
+        line = reader.line_num
+        try:
+            yield line, _record(
+                row.get("task") or row.get("task_name"),
+                row.get("start_time"),
+                row.get("end_time"),
+                row.get("duration_minutes"),
+                row.get("logged_at"),
+                row.get("no_time_assigned"),
+                row.get("date"),
+            )
+        except (ValueError, TypeError) as e:
+            yield line, e
+
+
+def _parse_ndjson(text: str) -> Iterator[tuple[int, dict | Exception]]:
+    for line, raw in enumerate(text.splitlines(), start=1):
+        if not raw.strip():
+            continue
+        try:
+            obj = json.loads(raw)
+            if not isinstance(obj, dict):
+                raise ValueError("Expected a JSON object")
+            yield line, _record(
+                obj.get("task_name") or obj.get("task"),
+                obj.get("start_time"),
+                obj.get("end_time"),
+                obj.get("duration_minutes"),
+                obj.get("logged_at"),
+                obj.get("no_time_assigned"),
+                obj.get("date"),
+            )
+        except (ValueError, TypeError) as e:
+            yield line, e
+
+
+def _parse_txt(text: str) -> Iterator[tuple[int, dict | Exception]]:
+    current: Optional[date] = None
+    for line, raw in enumerate(text.splitlines(), start=1):
+        raw = raw.strip()
+        if not raw or raw == "No activity logged yet.":
+            continue
+        if _TXT_DAY.match(raw):
+            current = date.fromisoformat(raw)
+            continue
+        m = _TXT_ROW.match(raw)
+        if not m or current is None:
+            yield line, ValueError("Unrecognized line")
+            continue
+        duration = int(m["hours"] or 0) * 60 + int(m["mins"])
+        day_start = datetime.combine(current, datetime.min.time())
+        try:
+            if m["start"] is None:
+                yield line, _record(m["name"], duration_minutes=duration, logged_at=day_start, no_time_assigned=True)
+                continue
+            if "--:--" in (m["start"], m["end"]):
+                raise ValueError("Running stopwatch rows cannot be imported")
+            start = datetime.combine(current, datetime.strptime(m["start"], "%H:%M").time())
+            end = datetime.combine(current, datetime.strptime(m["end"], "%H:%M").time())
+            if end < start:
+                end += timedelta(days=1)
+            yield line, _record(m["name"], start, end, duration, start)
+        except ValueError as e:
+            yield line, e
+
+
+_PARSERS = {"csv": _parse_csv, "ndjson": _parse_ndjson, "txt": _parse_txt}
+
+
+def import_activities(db: Session, text: str, fmt: str) -> ImportResult:
+    """Insert every parseable row of `text`. Does not commit; the caller owns the transaction."""
+    result = ImportResult()
+    task_ids: dict[str, int] = dict(db.execute(select(Task.name, Task.id)).all())
+    deltas: dict[tuple[date, int], list[int]] = defaultdict(lambda: [0, 0])
+    batch: list[dict] = []
+
+    def flush() -> None:
+        if batch:
+            db.execute(insert(Activity), batch)
+            result.imported += len(batch)
+            batch.clear()
+
+    for line, rec in _PARSERS[fmt](text):
+        if isinstance(rec, Exception):
+            result.errors.append({"line": line, "error": str(rec)})
+            continue
+        name = rec.pop("task_name")
+        task_id = task_ids.get(name)
+        if task_id is None:
+            task_id = db.execute(
+                insert(Task).values(name=name, color=allocate_task_colors(db)[0]).returning(Task.id)
+            ).scalar_one()
+            task_ids[name] = task_id
+            result.created_tasks.append(name)
+        rec["task_id"] = task_id
+        batch.append(rec)
+        bucket = deltas[(rec["logged_at"].date(), task_id)]
+        bucket[0] += rec["duration_minutes"]
+        bucket[1] += 1
+        if len(batch) >= INSERT_BATCH_SIZE:
+            flush()
+    flush()
+    rollup.apply_deltas(db, {k: (v[0], v[1]) for k, v in deltas.items()})
+    result.days = {day for day, _ in deltas}
+    return result
@@ -0,0 +1,214 @@
+"""Request and SQL instrumentation, rendered as Prometheus text at /api/metrics.
+
+MetricsMiddleware times every HTTP request by route template and counts response bytes.
+SQLAlchemy cursor hooks on both engines add each statement's time to the current
+request through a context variable (copied into threadpool workers and the aiosqlite
+greenlet). With TASK_LOGGER_SLOW_REQUEST_MS set, requests slower than that are logged
+together with the SQL they issued.
+"""
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Optional
+
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+SQL_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+SLOW_REQUEST_MS = float(os.environ.get("TASK_LOGGER_SLOW_REQUEST_MS", "0"))
+# Statements kept per request for the slow log
+MAX_LOGGED_STATEMENTS = 50
+
+slow_log = logging.getLogger("task_logger.slow")
+
+
+@dataclass
+class RequestSQL:
+    queries: int = 0
+    seconds: float = 0.0
+    statements: list[tuple[str, float]] = field(default_factory=list)
+
+
+_current: ContextVar[Optional[RequestSQL]] = ContextVar("task_logger_request_sql", default=None)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def lines(self, name: str, labels: str) -> list[str]:
+        out, running = [], 0
+        sep = "," if labels else ""
+        for bound, n in zip(self.buckets, self.counts):
+            running += n
+            out.append(f'{name}_bucket{{{labels}{sep}le="{bound}"}} {running}')
+        out.append(f'{name}_bucket{{{labels}{sep}le="+Inf"}} {self.count}')
+        out.append(f"{name}_sum{{{labels}}} {self.total}")
+        out.append(f"{name}_count{{{labels}}} {self.count}")
+        return out
+
+
+class Metrics:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.requests: dict[tuple[str, str, int], int] = {}
+        self.latency: dict[tuple[str, str], Histogram] = {}
+        self.response_bytes: dict[tuple[str, str], Histogram] = {}
+        self.request_queries: dict[tuple[str, str], Histogram] = {}
+        self.request_sql_seconds: dict[tuple[str, str], float] = {}
+        self.queries = 0
+        self.sql_seconds = 0.0
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float, size: int,
+                        sql: RequestSQL) -> None:
+        key = (method, route)
+        with self._lock:
+            self.requests[(method, route, status)] = self.requests.get((method, route, status), 0) + 1
+            self.latency.setdefault(key, Histogram(LATENCY_BUCKETS)).observe(seconds)
+            self.response_bytes.setdefault(key, Histogram(SIZE_BUCKETS)).observe(size)
+            self.request_queries.setdefault(key, Histogram(SQL_COUNT_BUCKETS)).observe(sql.queries)
+            self.request_sql_seconds[key] = self.request_sql_seconds.get(key, 0.0) + sql.seconds
+
+    def observe_query(self, seconds: float) -> None:
+        with self._lock:
+            self.queries += 1
+            self.sql_seconds += seconds
+
+    def render(self, gauges: dict[str, tuple[str, float]]) -> str:
+        """Prometheus text exposition. `gauges` maps metric name -> (help, value)."""
+        def label(method, route):
+            return f'method="{method}",route="{route}"'
+
+        with self._lock:
+            lines = [
+                "# HELP task_logger_http_requests_total HTTP requests by route template and status.",
+                "# TYPE task_logger_http_requests_total counter",
+            ]
+            for (method, route, status), n in sorted(self.requests.items()):
+                lines.append(f'task_logger_http_requests_total{{{label(method, route)},status="{status}"}} {n}')
+            for name, kind, help_text, series in (
+                ("task_logger_http_request_duration_seconds", "histogram",
+                 "Request latency until the last body byte.", self.latency),
+                ("task_logger_http_response_size_bytes", "histogram",
+                 "Response body size.", self.response_bytes),
+                ("task_logger_http_request_sql_queries", "histogram",
+                 "SQL statements executed per request.", self.request_queries),
+            ):
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+                for (method, route), hist in sorted(series.items()):
+                    lines += hist.lines(name, label(method, route))
+            lines += [
+                "# HELP task_logger_http_request_sql_seconds_total SQL time spent per route.",
+                "# TYPE task_logger_http_request_sql_seconds_total counter",
+            ]
+            for (method, route), seconds in sorted(self.request_sql_seconds.items()):
+                lines.append(f"task_logger_http_request_sql_seconds_total{{{label(method, route)}}} {seconds}")
+            lines += [
+                "# HELP task_logger_sql_queries_total SQL statements executed, in or out of requests.",
+                "# TYPE task_logger_sql_queries_total counter",
+                f"task_logger_sql_queries_total {self.queries}",
+                "# HELP task_logger_sql_seconds_total Time spent executing SQL statements.",
+                "# TYPE task_logger_sql_seconds_total counter",
+                f"task_logger_sql_seconds_total {self.sql_seconds}",
+            ]
+        for name, (help_text, value) in gauges.items():
+            kind = "counter" if name.endswith("_total") else "gauge"
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    metrics.observe_query(elapsed)
+    sql = _current.get()
+    if sql is not None:
+        sql.queries += 1
+        sql.seconds += elapsed
+        if SLOW_REQUEST_MS and len(sql.statements) < MAX_LOGGED_STATEMENTS:
+            sql.statements.append((statement, elapsed))
+
+
+def instrument_engine(engine) -> None:
+    """Attach the SQL timing hooks to a sync Engine (for async engines, pass .sync_engine)."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _route_label(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "<unmatched>"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware, so streaming responses are timed to their last byte."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        sql = RequestSQL()
+        token = _current.set(sql)
+        status = 500
+        size = 0
+        streaming_events = False
+
+        async def send_wrapper(message) -> None:
+            nonlocal status, size, streaming_events
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                for name, value in message.get("headers", ()):
+                    if name == b"content-type" and value.startswith(b"text/event-stream"):
+                        streaming_events = True
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            elapsed = time.perf_counter() - start
+            # Event streams stay open for the life of the page; their duration means nothing
+            if not streaming_events:
+                route = _route_label(scope)
+                metrics.observe_request(scope["method"], route, status, elapsed, size, sql)
+                if SLOW_REQUEST_MS and elapsed * 1000 >= SLOW_REQUEST_MS:
+                    _log_slow(scope, status, elapsed, sql)
+
+
+def _log_slow(scope, status: int, elapsed: float, sql: RequestSQL) -> None:
+    path = scope["path"] + (f"?{scope['query_string'].decode()}" if scope.get("query_string") else "")
+    lines = [
+        f"slow request: {scope['method']} {path} -> {status} in {elapsed * 1000:.1f} ms, "
+        f"{sql.queries} SQL statements in {sql.seconds * 1000:.1f} ms"
+    ]
+    for statement, seconds in sql.statements:
+        lines.append(f"  [{seconds * 1000:.2f} ms] {' '.join(statement.split())}")
+    if sql.queries > len(sql.statements):
+        lines.append(f"  ... {sql.queries - len(sql.statements)} more")
+    slow_log.warning("\n".join(lines))
@@ -0,0 +1,121 @@
+"""Maintain the daily_task_totals rollup used by the stats endpoints.
+
+Writers call these helpers inside their own transaction, before commit, so the rollup
+never drifts from the activities it summarizes. Run ``python -m backend.services.rollup``
+to rebuild the table from scratch if it ever does.
+"""
+from datetime import date, datetime
+
+from sqlalchemy import delete, func, insert, select, tuple_, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from backend.models import Activity, DailyTaskTotal
+
+
+def apply_deltas(db, deltas: dict[tuple[date, int], tuple[int, int]]) -> None:
+    """Add (minutes, count) to each (day, task_id) bucket in one executemany upsert,
+    then drop buckets that no longer hold any activities."""
+    if not deltas:
+        return
+    stmt = sqlite_insert(DailyTaskTotal)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DailyTaskTotal.day, DailyTaskTotal.task_id],
+        set_={
+            "total_minutes": DailyTaskTotal.total_minutes + stmt.excluded.total_minutes,
+            "activity_count": DailyTaskTotal.activity_count + stmt.excluded.activity_count,
+        },
+    )
+    db.execute(
+        stmt,
+        [
+            {"day": day, "task_id": task_id, "total_minutes": minutes, "activity_count": count}
+            for (day, task_id), (minutes, count) in deltas.items()
+        ],
+    )
+    emptied = [key for key, (_, count) in deltas.items() if count < 0]
+    if emptied:
+        db.execute(
+            delete(DailyTaskTotal).where(
+                tuple_(DailyTaskTotal.day, DailyTaskTotal.task_id).in_(emptied),
+                DailyTaskTotal.activity_count <= 0,
+            )
+        )
+
+
+def apply_delta(db, task_id: int, logged_at: datetime, minutes: int, count: int) -> None:
+    """Add minutes/count to the (day, task) bucket of one activity."""
+    apply_deltas(db, {(logged_at.date(), task_id): (minutes, count)})
+
+
+def add_activity(db, a: Activity) -> None:
+    apply_delta(db, a.task_id, a.logged_at, a.duration_minutes, 1)
+
+
+def remove_activity(db, a: Activity) -> None:
+    apply_delta(db, a.task_id, a.logged_at, -a.duration_minutes, -1)
+
+
+def remove_activities(db, *where) -> list[date]:
+    """Subtract every activity matching `where` from its bucket in one UPDATE ... FROM a
+    grouped read, then drop emptied buckets; call before deleting the activities.
+    Returns the days they were on."""
+    day = func.date(Activity.logged_at).label("day")
+    removed = (
+        select(
+            day,
+            Activity.task_id,
+            func.sum(Activity.duration_minutes).label("minutes"),
+            func.count(Activity.id).label("count"),
+        )
+        .where(*where)
+        .group_by(day, Activity.task_id)
+        .subquery()
+    )
+    days = db.execute(
+        update(DailyTaskTotal)
+        .values(
+            total_minutes=DailyTaskTotal.total_minutes - removed.c.minutes,
+            activity_count=DailyTaskTotal.activity_count - removed.c.count,
+        )
+        .where(DailyTaskTotal.day == removed.c.day, DailyTaskTotal.task_id == removed.c.task_id)
+        .returning(DailyTaskTotal.day)
+    ).scalars()
+    days = sorted(set(days))
+    if days:
+        db.execute(delete(DailyTaskTotal).where(DailyTaskTotal.day.in_(days), DailyTaskTotal.activity_count <= 0))
+    return days
+
+
+def remove_task(db, task_id: int) -> list[date]:
+    """Drop all buckets of a task; returns the days it had activity on."""
+    result = db.execute(
+        delete(DailyTaskTotal).where(DailyTaskTotal.task_id == task_id).returning(DailyTaskTotal.day)
+    )
+    return list(result.scalars())
+
+
+def rebuild_daily_totals(db) -> None:
+    """Recompute every bucket from the activities table. Accepts a Session or Connection."""
+    day = func.date(Activity.logged_at)
+    db.execute(delete(DailyTaskTotal))
+    db.execute(
+        insert(DailyTaskTotal).from_select(
+            ["day", "task_id", "total_minutes", "activity_count"],
+            select(
+                day,
+                Activity.task_id,
+                func.sum(Activity.duration_minutes),
+                func.count(Activity.id),
+            ).group_by(day, Activity.task_id),
+        )
+    )
+
+
+if __name__ == "__main__":
+    from backend.database import SessionLocal, init_db
+
+    init_db()
+    with SessionLocal() as session:
+        rebuild_daily_totals(session)
+        session.commit()
+    print("daily_task_totals rebuilt")
@@ -0,0 +1,182 @@
+"""In-memory index of the built frontend (frontend/dist) with precompressed variants.
+
+The index is built once at startup: every file's bytes, content type and content hash.
+gzip/brotli variants come from .gz/.br files written at build time when present (see
+__main__ below), otherwise they are compressed on first request and kept. Responses
+negotiate Content-Encoding, carry a strong ETag per variant and answer If-None-Match
+with 304. Hashed files under assets/ are cached as immutable; everything else, including
+index.html, is revalidated on every load.
+
+    python -m backend.services.static_assets [DIST_DIR]   # write .gz/.br next to each file
+"""
+import gzip
+import hashlib
+import mimetypes
+import sys
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Mapping, Optional
+
+from fastapi import Response
+
+try:
+    import brotli  # optional: pip install brotli
+except ImportError:
+    brotli = None
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+# Smaller files are not worth a Content-Encoding round trip
+MIN_COMPRESS_SIZE = 1024
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml",
+                      "application/manifest+json", "application/wasm")
+SPA_INDEX = "index.html"
+# Content-Encodings served besides identity, in order of preference
+ENCODINGS = ("br", "gzip")
+
+
+@dataclass
+class Asset:
+    content_type: str
+    digest: str
+    cache_control: str
+    # encoding ("identity", "gzip", "br") -> bytes; compressed entries may be filled lazily
+    variants: dict[str, bytes] = field(default_factory=dict)
+
+    @property
+    def compressible(self) -> bool:
+        return len(self.variants["identity"]) >= MIN_COMPRESS_SIZE and self.content_type.startswith(
+            COMPRESSIBLE_TYPES
+        )
+
+
+def _compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=11)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def _quality(params: str) -> float:
+    """The q-value among `;`-separated params; 1 if absent, 0 if it does not parse."""
+    for param in params.split(";"):
+        key, _, value = param.partition("=")
+        if key.strip().lower() == "q":
+            try:
+                return float(value)
+            except ValueError:
+                return 0.0
+    return 1.0
+
+
+def _accepted_encodings(accept_encoding: str) -> set[str]:
+    qualities = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        qualities[name.strip().lower()] = _quality(params)
+    # "*" stands for every encoding not listed on its own, so "*, gzip;q=0" means br only
+    wildcard = qualities.pop("*", 0.0)
+    for encoding in ENCODINGS:
+        qualities.setdefault(encoding, wildcard)
+    # "not > 0" also drops q=nan
+    return {name for name, q in qualities.items() if q > 0}
+
+
+class AssetIndex:
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self._assets: dict[str, Asset] = {}
+        self._lock = threading.Lock()
+
+    def load(self) -> None:
+        """Read every file under root (skipping build-time .gz/.br siblings) into the index."""
+        assets = {}
+        for path in sorted(self.root.rglob("*")):
+            if not path.is_file() or path.suffix in (".gz", ".br") and path.with_suffix("").is_file():
+                continue
+            rel = path.relative_to(self.root).as_posix()
+            data = path.read_bytes()
+            content_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+            if content_type.startswith("text/") or content_type == "application/javascript":
+                content_type += "; charset=utf-8"
+            asset = Asset(
+                content_type=content_type,
+                digest=hashlib.sha256(data).hexdigest()[:20],
+                cache_control=IMMUTABLE if rel.startswith("assets/") else REVALIDATE,
+                variants={"identity": data},
+            )
+            for encoding, suffix in (("gzip", ".gz"), ("br", ".br")):
+                prebuilt = path.with_name(path.name + suffix)
+                if prebuilt.is_file():
+                    asset.variants[encoding] = prebuilt.read_bytes()
+            assets[rel] = asset
+        self._assets = assets
+
+    def __len__(self) -> int:
+        return len(self._assets)
+
+    def lookup(self, path: str) -> Optional[Asset]:
+        """The file at `path`, index.html for client-side routes, or None for a missing
+        file under assets/ (so a stale bundle 404s instead of receiving HTML)."""
+        path = path.lstrip("/")
+        asset = self._assets.get(path)
+        if asset is None and not path.startswith("assets/"):
+            asset = self._assets.get(SPA_INDEX)
+        return asset
+
+    def _variant(self, asset: Asset, accept_encoding: str) -> tuple[str, bytes]:
+        if not asset.compressible:
+            return "identity", asset.variants["identity"]
+        accepted = _accepted_encodings(accept_encoding)
+        for encoding in ENCODINGS:
+            if encoding not in accepted or (encoding == "br" and brotli is None and "br" not in asset.variants):
+                continue
+            data = asset.variants.get(encoding)
+            if data is None:
+                data = _compress(asset.variants["identity"], encoding)
+                with self._lock:
+                    asset.variants[encoding] = data
+            if len(data) < len(asset.variants["identity"]):
+                return encoding, data
+        return "identity", asset.variants["identity"]
+
+    def response(self, path: str, headers: Mapping[str, str]) -> Response:
+        asset = self.lookup(path)
+        if asset is None:
+            return Response(status_code=404)
+        encoding, body = self._variant(asset, headers.get("accept-encoding", ""))
+        etag = f'"{asset.digest}"' if encoding == "identity" else f'"{asset.digest}-{encoding}"'
+        response_headers = {"ETag": etag, "Cache-Control": asset.cache_control}
+        if asset.compressible:
+            response_headers["Vary"] = "Accept-Encoding"
+        if encoding != "identity":
+            response_headers["Content-Encoding"] = encoding
+        if_none_match = headers.get("if-none-match")
+        if if_none_match and etag in [t.strip().removeprefix("W/") for t in if_none_match.split(",")]:
+            return Response(status_code=304, headers=response_headers)
+        return Response(body, media_type=asset.content_type, headers=response_headers)
+
+
+def precompress(root: Path) -> int:
+    """Write .gz (and .br when brotli is installed) next to every compressible file.
+    Returns the number of files written."""
+    index = AssetIndex(root)
+    index.load()
+    written = 0
+    for rel, asset in index._assets.items():
+        if not asset.compressible:
+            continue
+        path = root / rel
+        for encoding, suffix in (("gzip", ".gz"), ("br", ".br")):
+            if encoding == "br" and brotli is None:
+                continue
+            data = _compress(asset.variants["identity"], encoding)
+            if len(data) < len(asset.variants["identity"]):
+                path.with_name(path.name + suffix).write_bytes(data)
+                written += 1
+    return written
+
+
+if __name__ == "__main__":
+    dist = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(__file__).resolve().parents[2] / "frontend" / "dist"
+    print(f"{precompress(dist)} compressed files written to {dist}")
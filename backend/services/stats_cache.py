@@ -0,0 +1,100 @@
+"""Bounded LRU/TTL cache for stats query results, invalidated by writes.
+
+Entries are keyed by endpoint and the normalized (from_date, to_date) range. A write that
+touches an activity on day D drops every cached range containing D. Writers invalidate
+after commit; a generation counter stops a read that raced with a write from caching a
+result computed before that write became visible.
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Iterable
+
+MAX_ENTRIES = int(os.environ.get("TASK_LOGGER_STATS_CACHE_SIZE", "128"))
+TTL_SECONDS = float(os.environ.get("TASK_LOGGER_STATS_CACHE_TTL", "300"))
+
+_MISSING = object()
+
+
+class StatsCache:
+    def __init__(self, max_entries: int = MAX_ENTRIES, ttl_seconds: float = TTL_SECONDS) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[tuple[str, date, date], tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def generation(self) -> int:
+        """Read before computing a value and pass to put(); changes on every invalidation."""
+        return self._generation
+
+    def get(self, endpoint: str, from_date: date, to_date: date) -> Any:
+        """Cached value, or None on a miss."""
+        key = (endpoint, from_date, to_date)
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not _MISSING:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, endpoint: str, from_date: date, to_date: date, value: Any, generation: int) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[(endpoint, from_date, to_date)] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end((endpoint, from_date, to_date))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_days(self, days: Iterable[date]) -> None:
+        """Drop every cached range that contains any of `days`."""
+        days = sorted(set(days))
+        if not days:
+            return
+        with self._lock:
+            self._generation += 1
+            stale = []
+            for key in self._entries:
+                i = bisect_left(days, key[1])
+                if i < len(days) and days[i] <= key[2]:
+                    stale.append(key)
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def counters(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+            }
+
+
+stats_cache = StatsCache()
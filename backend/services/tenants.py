@@ -0,0 +1,218 @@
+"""Optional multi-tenant mode: one SQLite file per user instead of one shared database.
+
+With TASK_LOGGER_MULTI_TENANT=1 every API request names a tenant, either with a path
+prefix (/t/<tenant>/api/...) or a header (X-Task-Logger-User by default, see
+TASK_LOGGER_TENANT_HEADER). TenantMiddleware strips the prefix, opens the tenant and makes
+it current for the request; get_db, get_read_db and the routers then use that tenant's
+engines, writer thread, stats cache, event hub and analytics columns. Each file has its
+own write lock, so writes from different users commit in parallel, and a query only ever
+sees its own user's rows.
+
+Tenants live in DATA_DIR/tenants/<tenant>.db, created and migrated on first use. At most
+TASK_LOGGER_TENANT_CACHE are kept open (least recently used first out), and a tenant with
+no request for TASK_LOGGER_TENANT_IDLE_SECONDS is closed. A tenant serving a request,
+including an open event stream, is never closed. Health and metrics do not need a tenant.
+
+Without the flag nothing changes: the default tenant wraps the shared database and the
+module-level writer, caches and hub.
+"""
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+
+from backend.database import Database, database, init_db, reset_database, use_database
+from backend.paths import DATA_DIR
+from backend.services.analytics import ActivityColumns, activity_columns
+from backend.services.events import EventHub, hub
+from backend.services.metrics import instrument_engine
+from backend.services.stats_cache import StatsCache, stats_cache
+from backend.services.writer import Writer, writer
+
+MULTI_TENANT = os.environ.get("TASK_LOGGER_MULTI_TENANT", "0").lower() not in ("0", "false", "no", "")
+TENANT_HEADER = os.environ.get("TASK_LOGGER_TENANT_HEADER", "X-Task-Logger-User")
+MAX_OPEN_TENANTS = int(os.environ.get("TASK_LOGGER_TENANT_CACHE", "16"))
+IDLE_SECONDS = float(os.environ.get("TASK_LOGGER_TENANT_IDLE_SECONDS", "300"))
+TENANTS_DIR = DATA_DIR / "tenants"
+
+PATH_PREFIX = "/t/"
+# Lower case only, so names map to the same file on case-insensitive filesystems
+TENANT_NAME = re.compile(r"[a-z0-9][a-z0-9_-]{0,63}")
+# Windows opens these devices whatever the extension, so <name>.db would not be a file
+RESERVED_NAMES = frozenset(
+    ["con", "prn", "aux", "nul"] + [f"{port}{n}" for port in ("com", "lpt") for n in range(10)]
+)
+# API routes answered without a tenant (one may still be given, e.g. for its gauges)
+SHARED_PATHS = ("/api/health", "/api/metrics")
+
+
+@dataclass(eq=False)
+class Tenant:
+    database: Database
+    writer: Writer
+    stats_cache: StatsCache
+    hub: EventHub
+    columns: ActivityColumns
+    # Requests in flight; only tenants at 0 are closed
+    active: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+
+    @property
+    def name(self) -> str:
+        return self.database.name
+
+    @classmethod
+    def open(cls, name: str, path: Path) -> "Tenant":
+        """Open (creating and migrating if needed) the tenant's database file."""
+        db = Database.open(path, name)
+        instrument_engine(db.engine)
+        instrument_engine(db.async_engine.sync_engine)
+        init_db(db.engine)
+        return cls(
+            database=db,
+            writer=Writer(db.session_factory),
+            stats_cache=StatsCache(),
+            hub=EventHub(),
+            columns=ActivityColumns(db.engine),
+        )
+
+    async def close(self) -> None:
+        """Finish queued writes, then close every connection."""
+        await run_in_threadpool(self.writer.stop)
+        await self.database.dispose()
+
+
+default_tenant = Tenant(database, writer, stats_cache, hub, activity_columns)
+
+_current: ContextVar[Tenant] = ContextVar("task_logger_tenant", default=default_tenant)
+
+
+def current_tenant() -> Tenant:
+    return _current.get()
+
+
+class TenantRegistry:
+    """Open tenants in LRU order, bounded by count and idle time."""
+
+    def __init__(self, root: Path = TENANTS_DIR, max_open: int = MAX_OPEN_TENANTS,
+                 idle_seconds: float = IDLE_SECONDS) -> None:
+        self.root = root
+        self.max_open = max(1, max_open)
+        self.idle_seconds = idle_seconds
+        self._open: OrderedDict[str, Tenant] = OrderedDict()
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._open)
+
+    async def acquire(self, name: str) -> Tenant:
+        """The open tenant `name`, opening it if needed; pair with release()."""
+        tenant, expired = await run_in_threadpool(self._acquire, name)
+        for old in expired:
+            await old.close()
+        return tenant
+
+    def release(self, tenant: Tenant) -> None:
+        with self._lock:
+            tenant.active -= 1
+            tenant.last_used = time.monotonic()
+
+    async def close_all(self) -> None:
+        with self._lock:
+            tenants, self._open = list(self._open.values()), OrderedDict()
+        for tenant in tenants:
+            await tenant.close()
+
+    def _acquire(self, name: str) -> tuple[Tenant, list[Tenant]]:
+        # Opening happens under the lock, so two first requests cannot open a file twice
+        with self._lock:
+            tenant = self._open.get(name)
+            if tenant is None:
+                self.root.mkdir(parents=True, exist_ok=True)
+                tenant = Tenant.open(name, self.root / f"{name}.db")
+                self._open[name] = tenant
+                self.opened += 1
+            else:
+                self._open.move_to_end(name)
+            tenant.active += 1
+            return tenant, self._evict()
+
+    def _evict(self) -> list[Tenant]:
+        """Unlink idle tenants past IDLE_SECONDS or beyond max_open, oldest first. Busy
+        tenants stay, even if that leaves more than max_open open for a while."""
+        now, expired = time.monotonic(), []
+        for name, tenant in list(self._open.items()):
+            if tenant.active:
+                continue
+            if len(self._open) > self.max_open or now - tenant.last_used > self.idle_seconds:
+                del self._open[name]
+                expired.append(tenant)
+        self.evicted += len(expired)
+        return expired
+
+
+tenants = TenantRegistry()
+
+
+def _tenant_name(scope) -> Optional[str]:
+    """The tenant the request names, if any, stripping a path prefix from the scope."""
+    path: str = scope["path"]
+    if path.startswith(PATH_PREFIX):
+        name, slash, rest = path[len(PATH_PREFIX):].partition("/")
+        scope["path"] = slash + rest or "/"
+        scope["raw_path"] = scope["path"].encode()
+        return name
+    header = TENANT_HEADER.lower().encode()
+    for key, value in scope.get("headers", ()):
+        if key == header:
+            return value.decode("latin-1").strip()
+    return None
+
+
+class TenantMiddleware:
+    """Resolves the request's tenant and makes its database current (pure ASGI, so the
+    tenant stays open until a streaming response has sent its last byte)."""
+
+    def __init__(self, app, registry: TenantRegistry = tenants) -> None:
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        name = _tenant_name(scope)
+        if name is None:
+            path = scope["path"]
+            # CORS preflights cannot carry the header; the CORS middleware answers them
+            if (path.startswith("/api/") and not path.startswith(SHARED_PATHS)
+                    and scope["method"] != "OPTIONS"):
+                detail = f"Multi-tenant mode: use a {PATH_PREFIX}<tenant>/ prefix or the {TENANT_HEADER} header"
+                await JSONResponse({"detail": detail}, status_code=400)(scope, receive, send)
+                return
+            await self.app(scope, receive, send)
+            return
+        if not TENANT_NAME.fullmatch(name) or name in RESERVED_NAMES:
+            detail = ("Tenant names are 1-64 lower-case letters, digits, '-' or '_', "
+                      "and not a Windows device name such as 'con' or 'nul'")
+            await JSONResponse({"detail": detail}, status_code=400)(scope, receive, send)
+            return
+        tenant = await self.registry.acquire(name)
+        tenant_token = _current.set(tenant)
+        database_token = use_database(tenant.database)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            reset_database(database_token)
+            _current.reset(tenant_token)
+            self.registry.release(tenant)
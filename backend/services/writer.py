@@ -0,0 +1,145 @@
+"""Single writer thread that runs every database mutation and commits them in groups.
+
+Write endpoints hand a function of a Session to `await writer.run(fn)` instead of opening
+their own session. The writer thread takes whatever jobs are queued (up to
+TASK_LOGGER_WRITE_BATCH, waiting at most TASK_LOGGER_WRITE_LINGER_MS for more), opens one
+BEGIN IMMEDIATE transaction and runs each job inside its own SAVEPOINT. A job that raises
+(an HTTPException for a missing task, say) rolls back only its savepoint and gets its
+exception back; the rest commit together, so a burst of writes costs one fsync rather
+than one each. Results are only delivered after the COMMIT succeeded, so callers can
+publish their change events straight away.
+
+Jobs must return plain data (rows, dicts, response models), not ORM objects: the session
+is closed by the time the caller sees the result.
+"""
+import asyncio
+import contextvars
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional, TypeVar
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session, sessionmaker
+
+from backend.database import SessionLocal
+
+T = TypeVar("T")
+
+MAX_BATCH = int(os.environ.get("TASK_LOGGER_WRITE_BATCH", "64"))
+LINGER_SECONDS = float(os.environ.get("TASK_LOGGER_WRITE_LINGER_MS", "0")) / 1000
+
+
+@dataclass(eq=False)
+class _Job:
+    fn: Callable[[Session], Any]
+    future: Future = field(default_factory=Future)
+    # The submitter's context, so SQL timing lands on the request that asked for the write
+    context: contextvars.Context = field(default_factory=contextvars.copy_context)
+
+
+class Writer:
+    def __init__(
+        self,
+        session_factory: sessionmaker = SessionLocal,
+        max_batch: int = MAX_BATCH,
+        linger_seconds: float = LINGER_SECONDS,
+    ) -> None:
+        self.session_factory = session_factory
+        self.max_batch = max(1, max_batch)
+        self.linger_seconds = linger_seconds
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.jobs = 0
+
+    def submit(self, fn: Callable[[Session], T]) -> "Future[T]":
+        job = _Job(fn)
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="task-logger-writer", daemon=True)
+                self._thread.start()
+            self._queue.put(job)
+        return job.future
+
+    async def run(self, fn: Callable[[Session], T]) -> T:
+        """Run fn(session) on the writer thread; returns its result once committed, or raises
+        what fn raised."""
+        return await asyncio.wrap_future(self.submit(fn))
+
+    def stop(self) -> None:
+        """Finish queued jobs and end the thread; the next submit starts a new one."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            if thread is None:
+                return
+            self._queue.put(None)
+        thread.join()
+
+    def _next_batch(self, first: _Job) -> tuple[list[_Job], bool]:
+        batch, deadline = [first], time.monotonic() + self.linger_seconds
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                job = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is None:
+                return batch, True
+            batch.append(job)
+        return batch, False
+
+    def _loop(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            batch, stopping = self._next_batch(job)
+            try:
+                self._run_batch(batch)
+            except Exception as e:
+                # Opening the session or a failed rollback: fail what is left of the batch
+                # and keep serving, or every later write would wait on a dead thread
+                for job in batch:
+                    if not job.future.done():
+                        job.future.set_exception(e)
+            if stopping:
+                return
+
+    def _run_batch(self, batch: list[_Job]) -> None:
+        outcomes: list[tuple[_Job, Any, Optional[Exception]]] = []
+        with self.session_factory() as db:
+            try:
+                # Take the write lock up front; savepoints inside it do not commit on release
+                db.execute(text("BEGIN IMMEDIATE"))
+                for job in batch:
+                    if not job.future.set_running_or_notify_cancel():
+                        continue
+                    try:
+                        with db.begin_nested():
+                            result = job.context.run(job.fn, db)
+                    except Exception as e:
+                        outcomes.append((job, None, e))
+                    else:
+                        outcomes.append((job, result, None))
+                db.commit()
+            except Exception as e:
+                # BEGIN or COMMIT failed: nothing in the batch was written
+                db.rollback()
+                ran = [job for job, _, _ in outcomes]
+                outcomes = [(job, None, error or e) for job, _, error in outcomes]
+                outcomes += [(job, None, e) for job in batch if job not in ran and not job.future.cancelled()]
+        self.batches += 1
+        self.jobs += len(outcomes)
+        for job, result, error in outcomes:
+            if error is not None:
+                job.future.set_exception(error)
+            else:
+                job.future.set_result(result)
+
+
+writer = Writer()
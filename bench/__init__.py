@@ -0,0 +1 @@
+"""Synthetic data generator and API benchmarks (not shipped with the app)."""
@@ -0,0 +1,127 @@
+"""Fill a TASK_LOGGER_DATA directory with a synthetic activity history.
+
+    python -m bench.generate DATA_DIR --rows 1000000 [--tasks 25] [--years 5] [--seed 1]
+
+Roughly three quarters of the rows are finished stopwatch entries,
+the rest are manual "no time assigned" durations; the newest stopwatch is left running
+unless --no-running is given. Rows are bulk-loaded with the sqlite3 driver and the
+daily rollup is rebuilt at the end. The directory must not already contain a database.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+BATCH_SIZE = 50_000
+DT_FORMAT = "%Y-%m-%d %H:%M:%S.%f"  # SQLAlchemy's DateTime storage format on SQLite
+
+TASK_NAMES = [
+    "Deep work", "Email", "Meetings", "Code review", "Reading", "Planning", "Exercise",
+    "Admin", "Research", "Writing", "Design", "Support", "Learning", "Errands", "Calls",
+]
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _rows(n_rows: int, task_ids: list[int], years: float, seed: int, running: bool):
+    """Yield activity tuples in logged_at order, spread over the last `years` years."""
+    rng = random.Random(seed)
+    end = _utcnow().replace(microsecond=0)
+    span = timedelta(days=365 * years).total_seconds()
+    start = end - timedelta(seconds=span)
+    # Skewed task popularity, like real use: a few tasks dominate
+    weights = [1 / (i + 1) for i in range(len(task_ids))]
+    step = span / max(n_rows, 1)
+    for i in range(n_rows):
+        logged = start + timedelta(seconds=i * step + rng.random() * step)
+        task_id = rng.choices(task_ids, weights)[0]
+        duration = max(1, int(rng.lognormvariate(3.4, 0.8)))
+        if rng.random() < 0.25:
+            # Manual entry: either pinned to noon of the day or to the time it was logged
+            display = logged if rng.random() < 0.5 else logged.replace(hour=12, minute=0, second=0)
+            yield (task_id, None, None, duration, logged.strftime(DT_FORMAT), 1, display.strftime(DT_FORMAT))
+        else:
+            stop = logged + timedelta(minutes=duration)
+            yield (task_id, logged.strftime(DT_FORMAT), stop.strftime(DT_FORMAT), duration,
+                   logged.strftime(DT_FORMAT), 0, None)
+    if running:
+        now = _utcnow().strftime(DT_FORMAT)
+        yield (task_ids[0], now, None, 0, now, 0, None)
+
+
+def generate(data_dir: Path, rows: int, tasks: int = 25, years: float = 5, seed: int = 1,
+             running: bool = True) -> None:
+    data_dir.mkdir(parents=True, exist_ok=True)
+    os.environ["TASK_LOGGER_DATA"] = str(data_dir)
+
+    from backend.database import DB_PATH, SessionLocal, engine, init_db
+    from backend.models import Task
+    from backend.services.color import allocate_task_colors
+    from backend.services.rollup import rebuild_daily_totals
+
+    if DB_PATH.exists():
+        raise SystemExit(f"{DB_PATH} already exists")
+    init_db()
+    with SessionLocal() as session:
+        names = [
+            TASK_NAMES[i % len(TASK_NAMES)] + (f" {i // len(TASK_NAMES) + 1}" if i >= len(TASK_NAMES) else "")
+            for i in range(tasks)
+        ]
+        session.add_all(Task(name=n, color=c) for n, c in zip(names, allocate_task_colors(session, tasks)))
+        session.commit()
+        task_ids = [t.id for t in session.query(Task).order_by(Task.id)]
+
+    t0 = time.perf_counter()
+    raw = engine.raw_connection()
+    try:
+        cur = raw.cursor()
+        cur.execute("PRAGMA synchronous=OFF")
+        sql = (
+            "INSERT INTO activities (task_id, start_time, end_time, duration_minutes, logged_at,"
+            " no_time_assigned, display_time) VALUES (?, ?, ?, ?, ?, ?, ?)"
+        )
+        batch = []
+        done = 0
+        for row in _rows(rows, task_ids, years, seed, running):
+            batch.append(row)
+            if len(batch) >= BATCH_SIZE:
+                cur.executemany(sql, batch)
+                raw.commit()
+                done += len(batch)
+                batch.clear()
+                print(f"\r{done:,} rows", end="", file=sys.stderr)
+        if batch:
+            cur.executemany(sql, batch)
+            raw.commit()
+            done += len(batch)
+        print(f"\r{done:,} rows in {time.perf_counter() - t0:.1f}s", file=sys.stderr)
+    finally:
+        raw.close()
+
+    with engine.begin() as conn:
+        rebuild_daily_totals(conn)
+    with engine.connect() as conn:
+        conn.exec_driver_sql("ANALYZE")
+        conn.commit()
+    engine.dispose()
+
+
+def main(argv: list[str] | None = None) -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("data_dir", type=Path)
+    p.add_argument("--rows", type=int, required=True, help="number of activities")
+    p.add_argument("--tasks", type=int, default=25)
+    p.add_argument("--years", type=float, default=5, help="history length, ending now")
+    p.add_argument("--seed", type=int, default=1)
+    p.add_argument("--no-running", dest="running", action="store_false", help="no open stopwatch")
+    args = p.parse_args(argv)
+    generate(args.data_dir, args.rows, args.tasks, args.years, args.seed, args.running)
+
+
+if __name__ == "__main__":
+    main()
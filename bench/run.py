@@ -0,0 +1,357 @@
+"""Benchmark every API route in-process against synthetic histories of several sizes.
+
+    python -m bench.run [--sizes 10k,1m,10m] [--iterations 50] [--max-seconds 5]
+    python -m bench.run --sizes 10k --save-baseline
+    python -m bench.run --sizes 10k --check        # exit 1 on a p50 regression
+
+Datasets are generated once per size under --data-root (see bench.generate) and reused.
+Each size runs in a fresh subprocess (the backend binds its database at import) that
+drives the ASGI app through httpx, so numbers include routing, validation and
+serialization but no network. Per route it reports p50/p99 latency, sequential
+throughput and the process's peak RSS so far. Results go to bench/results/latest.json;
+--save-baseline copies them to baseline.json, and --check compares p50 against it.
+Write routes undo their own changes outside the timed section. The stats cache is
+disabled unless --stats-cache is given, so stats routes measure their queries.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional
+
+BENCH_DIR = Path(__file__).resolve().parent
+RESULTS_DIR = BENCH_DIR / "results"
+DEFAULT_DATA_ROOT = BENCH_DIR / ".data"
+
+# Routes that cannot be timed request/response style
+SKIPPED_ROUTES = {("GET", "/api/events")}
+
+
+def parse_size(label: str) -> int:
+    label = label.strip().lower()
+    scale = {"k": 1_000, "m": 1_000_000}.get(label[-1:], 1)
+    return int(float(label.rstrip("km")) * scale)
+
+
+def _peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+@dataclass
+class Case:
+    """One timed request. `before` runs untimed and may return values for the request;
+    `after` runs untimed with the response to undo any change."""
+
+    name: str
+    route: tuple[str, str]
+    request: Callable[[dict, dict], dict]
+    before: Optional[Callable[[Any, dict], Awaitable[dict]]] = None
+    after: Optional[Callable[[Any, dict, Any], Awaitable[None]]] = None
+
+
+def _cases() -> list[Case]:
+    today = date.today()
+    month_ago = (today - timedelta(days=30)).isoformat()
+    year_ago = (today - timedelta(days=365)).isoformat()
+
+    def get(url):
+        return lambda ctx, pre: {"method": "GET", "url": url.format(**ctx, **pre)}
+
+    async def start_stopwatch(client, ctx):
+        r = await client.post("/api/activities", json={"task_id": ctx["task_id"]})
+        return {"activity_id": r.json()["id"]}
+
+    async def create_manual(client, ctx):
+        r = await client.post("/api/activities/manual", json={"task_id": ctx["task_id"], "duration_minutes": 5})
+        return {"activity_id": r.json()["id"]}
+
+    async def create_task(client, ctx):
+        ctx["seq"] += 1
+        r = await client.post("/api/tasks", json={"name": f"bench task {ctx['seq']}"})
+        return {"task_id": r.json()["id"]}
+
+    async def create_task_with_history(client, ctx):
+        pre = await create_task(client, ctx)
+        name = f"bench task {ctx['seq']}"
+        rows = "".join(f"{name},30,{(today - timedelta(days=i)).isoformat()}T08:00:00\n" for i in range(500))
+        await client.post("/api/activities/bulk", content="task,duration_minutes,logged_at\n" + rows,
+                          headers={"content-type": "text/csv"})
+        return pre
+
+    async def start_before_switch(client, ctx):
+        return {**await start_stopwatch(client, ctx), **await create_task(client, ctx)}
+
+    async def undo_switch(client, ctx, response):
+        await client.delete(f"/api/activities/{ctx['pre']['activity_id']}")
+        await client.delete(f"/api/tasks/{ctx['pre']['task_id']}")
+
+    async def delete_activity(client, ctx, response):
+        await client.delete(f"/api/activities/{response.json()['id']}")
+
+    async def delete_created_activity(client, ctx, response):
+        await client.delete(f"/api/activities/{ctx['pre']['activity_id']}")
+
+    async def delete_task(client, ctx, response):
+        body = response.json()
+        for task in body if isinstance(body, list) else [body]:
+            await client.delete(f"/api/tasks/{task['id']}")
+
+    async def delete_created_task(client, ctx, response):
+        await client.delete(f"/api/tasks/{ctx['pre']['task_id']}")
+
+    async def delete_imported(client, ctx, response):
+        tasks = (await client.get("/api/tasks")).json()
+        for task in tasks:
+            if task["name"] in response.json()["created_tasks"]:
+                await client.delete(f"/api/tasks/{task['id']}")
+
+    def new_task(ctx, pre):
+        ctx["seq"] += 1
+        return {"method": "POST", "url": "/api/tasks", "json": {"name": f"bench task {ctx['seq']}"}}
+
+    def bulk_tasks(ctx, pre):
+        ctx["seq"] += 1
+        return {"method": "POST", "url": "/api/tasks/bulk",
+                "json": {"names": [f"bench bulk {ctx['seq']}-{i}" for i in range(10)]}}
+
+    def bulk_import(ctx, pre):
+        ctx["seq"] += 1
+        rows = "".join(f"bench import {ctx['seq']},{i % 90 + 1},{today.isoformat()}T08:00:00\n" for i in range(100))
+        return {"method": "POST", "url": "/api/activities/bulk", "content": "task,duration_minutes,logged_at\n" + rows,
+                "headers": {"content-type": "text/csv"}}
+
+    return [
+        Case("tasks", ("GET", "/api/tasks"), get("/api/tasks")),
+        Case("task", ("GET", "/api/tasks/{task_id}"), get("/api/tasks/{task_id}")),
+        Case("running", ("GET", "/api/activities/running"), get("/api/activities/running")),
+        Case("days", ("GET", "/api/activities/days"),
+             get(f"/api/activities/days?year={today.year}&month={today.month}")),
+        Case("heatmap year", ("GET", "/api/activities/heatmap"),
+             get(f"/api/activities/heatmap?from_date={today.year}-01-01&to_date={today.year}-12-31"
+                 "&tz=Europe/Berlin")),
+        Case("list page", ("GET", "/api/activities"), get("/api/activities?limit=50")),
+        Case("list day", ("GET", "/api/activities"),
+             get(f"/api/activities?from_date={today.isoformat()}&to_date={today.isoformat()}&all=true")),
+        Case("list month", ("GET", "/api/activities"), get(f"/api/activities?from_date={month_ago}&all=true")),
+        Case("stats month", ("GET", "/api/activities/stats"), get("/api/activities/stats")),
+        Case("stats year", ("GET", "/api/activities/stats"), get(f"/api/activities/stats?from_date={year_ago}")),
+        Case("time series year", ("GET", "/api/activities/stats/time_series"),
+             get(f"/api/activities/stats/time_series?from_date={year_ago}")),
+        Case("aggregate week 9y", ("GET", "/api/activities/stats/aggregate"),
+             get(f"/api/activities/stats/aggregate?granularity=week&from_date={today.year - 9}-01-01"
+                 "&tz=Europe/Berlin")),
+        Case("aggregate hour year", ("GET", "/api/activities/stats/aggregate"),
+             get(f"/api/activities/stats/aggregate?granularity=hour&from_date={year_ago}&tz=Europe/Berlin")),
+        Case("dashboard year", ("GET", "/api/dashboard"),
+             get(f"/api/dashboard?fields=days,stats,time_series&from_date={year_ago}"
+                 f"&days_from={today.year}-01-01&days_to={today.year}-12-31&tz=UTC")),
+        Case("stats cache", ("GET", "/api/activities/stats/cache"), get("/api/activities/stats/cache")),
+        Case("export month csv", ("GET", "/api/activities/export"),
+             get(f"/api/activities/export?from_date={month_ago}&format=csv")),
+        Case("settings", ("GET", "/api/settings"), get("/api/settings")),
+        Case("metrics", ("GET", "/api/metrics"), get("/api/metrics")),
+        Case("health", ("GET", "/api/health"), get("/api/health")),
+        Case("update settings", ("PUT", "/api/settings"),
+             lambda ctx, pre: {"method": "PUT", "url": "/api/settings", "json": ctx["settings"]}),
+        Case("create task", ("POST", "/api/tasks"), new_task, after=delete_task),
+        Case("create 10 tasks", ("POST", "/api/tasks/bulk"), bulk_tasks, after=delete_task),
+        Case("delete task", ("DELETE", "/api/tasks/{task_id}"),
+             lambda ctx, pre: {"method": "DELETE", "url": f"/api/tasks/{pre['task_id']}"}, before=create_task),
+        Case("delete task 500 activities", ("DELETE", "/api/tasks/{task_id}"),
+             lambda ctx, pre: {"method": "DELETE", "url": f"/api/tasks/{pre['task_id']}"},
+             before=create_task_with_history),
+        Case("delete 500 activities of task", ("DELETE", "/api/activities"),
+             lambda ctx, pre: {"method": "DELETE", "url": f"/api/activities?task_id={pre['task_id']}"},
+             before=create_task_with_history, after=delete_created_task),
+        Case("log manual", ("POST", "/api/activities/manual"),
+             lambda ctx, pre: {"method": "POST", "url": "/api/activities/manual",
+                               "json": {"task_id": ctx["task_id"], "duration_minutes": 30}},
+             after=delete_activity),
+        Case("start stopwatch", ("POST", "/api/activities"),
+             lambda ctx, pre: {"method": "POST", "url": "/api/activities", "json": {"task_id": ctx["task_id"]}},
+             after=delete_activity),
+        Case("stop stopwatch", ("PATCH", "/api/activities/{activity_id}"),
+             lambda ctx, pre: {"method": "PATCH", "url": f"/api/activities/{pre['activity_id']}"},
+             before=start_stopwatch, after=delete_created_activity),
+        Case("switch stopwatch", ("POST", "/api/activities/switch"),
+             lambda ctx, pre: {"method": "POST", "url": "/api/activities/switch", "json": {"task_id": pre["task_id"]}},
+             before=start_before_switch, after=undo_switch),
+        Case("delete activity", ("DELETE", "/api/activities/{activity_id}"),
+             lambda ctx, pre: {"method": "DELETE", "url": f"/api/activities/{pre['activity_id']}"},
+             before=create_manual),
+        Case("import 100 csv rows", ("POST", "/api/activities/bulk"), bulk_import, after=delete_imported),
+    ]
+
+
+def _percentile(sorted_ms: list[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    index = max(0, min(len(sorted_ms) - 1, round(pct / 100 * len(sorted_ms) + 0.5) - 1))
+    return sorted_ms[index]
+
+
+async def _run_cases(iterations: int, max_seconds: float, only: Optional[str]) -> dict:
+    import httpx
+    from fastapi.routing import APIRoute
+
+    from backend.main import app
+
+    results: dict[str, Any] = {"routes": {}}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            tasks = (await client.get("/api/tasks")).json()
+            running = (await client.get("/api/activities/running")).json()
+            if running:
+                # Write cases need a free stopwatch; an equivalent one is restarted at the end
+                await client.delete(f"/api/activities/{running['id']}")
+            ctx = {
+                "task_id": tasks[0]["id"],
+                "seq": int(time.time()),
+                "settings": (await client.get("/api/settings")).json(),
+            }
+            cases = [c for c in _cases() if not only or only in c.name]
+            for case in cases:
+                timings: list[float] = []
+                deadline = time.perf_counter() + max_seconds
+                # One untimed warm-up run, then until enough samples or out of time
+                for i in range(iterations + 1):
+                    pre = await case.before(client, ctx) if case.before else {}
+                    ctx["pre"] = pre
+                    request = case.request(ctx, pre)
+                    t0 = time.perf_counter()
+                    response = await client.request(**request)
+                    elapsed = time.perf_counter() - t0
+                    if response.status_code >= 400:
+                        raise SystemExit(f"{case.name}: {response.status_code} {response.text[:200]}")
+                    if case.after:
+                        await case.after(client, ctx, response)
+                    if i:
+                        timings.append(elapsed * 1000)
+                    if i >= 3 and time.perf_counter() > deadline:
+                        break
+                timings.sort()
+                results["routes"][case.name] = {
+                    "route": " ".join(case.route),
+                    "n": len(timings),
+                    "p50_ms": round(_percentile(timings, 50), 3),
+                    "p99_ms": round(_percentile(timings, 99), 3),
+                    "rps": round(len(timings) / (sum(timings) / 1000), 1),
+                    "peak_rss_mb": _peak_rss_mb(),
+                }
+            if running:
+                await client.post("/api/activities", json={"task_id": running["task_id"]})
+
+    covered = {c.route for c in _cases()} | SKIPPED_ROUTES
+    results["uncovered_routes"] = sorted(
+        f"{method} {route.path}"
+        for route in app.routes
+        if isinstance(route, APIRoute) and route.path.startswith("/api/")
+        for method in route.methods
+        if (method, route.path) not in covered
+    )
+    results["peak_rss_mb"] = _peak_rss_mb()
+    return results
+
+
+def _child(args) -> None:
+    os.environ["TASK_LOGGER_DATA"] = str(args.child)
+    if not args.stats_cache:
+        os.environ["TASK_LOGGER_STATS_CACHE_SIZE"] = "0"
+    results = asyncio.run(_run_cases(args.iterations, args.max_seconds, args.only))
+    json.dump(results, sys.stdout)
+
+
+def _ensure_dataset(data_root: Path, rows: int) -> Path:
+    data_dir = data_root / f"rows-{rows}"
+    if not (data_dir / "task_logger.db").exists():
+        print(f"Generating {rows:,} rows in {data_dir} ...", file=sys.stderr)
+        subprocess.run([sys.executable, "-m", "bench.generate", str(data_dir), "--rows", str(rows)], check=True)
+    return data_dir
+
+
+def _print_results(results: dict) -> None:
+    for size, res in results.items():
+        print(f"\n== {size} rows (peak RSS {res['peak_rss_mb']} MB)")
+        print(f"{'case':<22} {'route':<42} {'p50 ms':>9} {'p99 ms':>9} {'req/s':>9}")
+        for name, r in res["routes"].items():
+            print(f"{name:<22} {r['route']:<42} {r['p50_ms']:>9.2f} {r['p99_ms']:>9.2f} {r['rps']:>9.1f}")
+        if res["uncovered_routes"]:
+            print("not benchmarked:", ", ".join(res["uncovered_routes"]))
+
+
+def _regressions(results: dict, baseline: dict, tolerance: float, floor_ms: float) -> list[str]:
+    """p50 slower than baseline by more than `tolerance` (fraction) and `floor_ms`."""
+    found = []
+    for size, res in results.items():
+        for name, r in res["routes"].items():
+            base = baseline.get(size, {}).get("routes", {}).get(name)
+            if base is None:
+                continue
+            limit = max(base["p50_ms"] * (1 + tolerance), base["p50_ms"] + floor_ms)
+            if r["p50_ms"] > limit:
+                found.append(f"{size} {name}: p50 {r['p50_ms']:.2f} ms > {limit:.2f} ms (baseline {base['p50_ms']:.2f})")
+    return found
+
+
+def main(argv: list[str] | None = None) -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--sizes", default="10k,1m,10m", help="comma-separated row counts, e.g. 10k,1m")
+    p.add_argument("--iterations", type=int, default=50, help="timed requests per route")
+    p.add_argument("--max-seconds", type=float, default=5, help="time budget per route")
+    p.add_argument("--only", help="run cases whose name contains this text")
+    p.add_argument("--data-root", type=Path, default=DEFAULT_DATA_ROOT)
+    p.add_argument("--stats-cache", action="store_true", help="leave the stats cache enabled")
+    p.add_argument("--save-baseline", action="store_true")
+    p.add_argument("--check", action="store_true", help="fail if p50 regressed against the baseline")
+    p.add_argument("--tolerance", type=float, default=0.5, help="allowed p50 slowdown, as a fraction")
+    p.add_argument("--floor-ms", type=float, default=2.0, help="ignore slowdowns smaller than this")
+    p.add_argument("--child", type=Path, help=argparse.SUPPRESS)
+    args = p.parse_args(argv)
+
+    if args.child:
+        _child(args)
+        return
+
+    results = {}
+    for label in args.sizes.split(","):
+        rows = parse_size(label)
+        data_dir = _ensure_dataset(args.data_root, rows)
+        cmd = [sys.executable, "-m", "bench.run", "--child", str(data_dir),
+               "--iterations", str(args.iterations), "--max-seconds", str(args.max_seconds)]
+        if args.only:
+            cmd += ["--only", args.only]
+        if args.stats_cache:
+            cmd.append("--stats-cache")
+        out = subprocess.run(cmd, check=True, stdout=subprocess.PIPE, text=True).stdout
+        results[label] = json.loads(out)
+    _print_results(results)
+
+    RESULTS_DIR.mkdir(exist_ok=True)
+    (RESULTS_DIR / "latest.json").write_text(json.dumps(results, indent=2))
+    baseline_path = RESULTS_DIR / "baseline.json"
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps(results, indent=2))
+        print(f"\nBaseline saved to {baseline_path}")
+    if args.check:
+        if not baseline_path.exists():
+            raise SystemExit(f"No baseline at {baseline_path}; run with --save-baseline first")
+        found = _regressions(results, json.loads(baseline_path.read_text()), args.tolerance, args.floor_ms)
+        if found:
+            print("\nRegressions:\n  " + "\n  ".join(found))
+            raise SystemExit(1)
+        print("\nNo regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
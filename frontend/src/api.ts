@@ -1,4 +1,7 @@
-const API_BASE = import.meta.env.DEV ? '' : '';
+// A multi-tenant server serves each user's app under /t/<tenant>/; API calls keep the prefix
+export const TENANT_PREFIX = window.location.pathname.match(/^\/t\/[a-z0-9][a-z0-9_-]*/)?.[0] ?? '';
+
+const API_BASE = TENANT_PREFIX;
 
 export interface Task {
   id: number;
@@ -20,6 +23,11 @@ export interface Activity {
   display_time: string | null;
 }
 
+export interface ActivityPage {
+  items: Activity[];
+  next_cursor: string | null;
+}
+
 export interface RunningActivity {
   id: number;
   task_id: number;
@@ -48,6 +56,124 @@ export interface StatsTimeSeriesPoint {
   hours: number;
 }
 
+export interface HeatmapDay {
+  date: string;
+  total_minutes: number;
+  activity_count: number;
+}
+
+export type AggregateGranularity = 'day' | 'week' | 'month' | 'weekday' | 'hour';
+
+export interface Percentiles {
+  p50: number;
+  p90: number;
+  p99: number;
+}
+
+export interface AggregateStats {
+  granularity: AggregateGranularity;
+  from_date: string;
+  to_date: string;
+  window: number | null;
+  buckets: { bucket: string; total_minutes: number; activity_count: number; rolling_avg_minutes: number | null }[];
+  by_task: { bucket: string; task_id: number; total_minutes: number; activity_count: number }[];
+  bucket_minutes: Percentiles | null;
+  activity_minutes: Percentiles | null;
+}
+
+export type DashboardField = 'days' | 'activities' | 'stats' | 'time_series';
+
+export interface Dashboard {
+  days?: HeatmapDay[];
+  activities?: Activity[];
+  stats?: StatsByTask[];
+  time_series?: StatsTimeSeriesPoint[];
+}
+
+export type ChangeEventType =
+  | 'activity.started'
+  | 'activity.stopped'
+  | 'activity.created'
+  | 'activity.deleted'
+  | 'activities.imported'
+  | 'activities.deleted'
+  | 'task.created'
+  | 'task.deleted'
+  | 'resync';
+
+export interface ChangeEvent {
+  type: ChangeEventType;
+  data: any;
+}
+
+const CHANGE_EVENT_TYPES: ChangeEventType[] = [
+  'activity.started',
+  'activity.stopped',
+  'activity.created',
+  'activity.deleted',
+  'activities.imported',
+  'activities.deleted',
+  'task.created',
+  'task.deleted',
+  'resync',
+];
+
+type ChangeListener = (e: ChangeEvent) => void;
+
+// One event stream per tab, shared by every subscriber, and only while the tab is visible:
+// each open stream holds one of the browser's six HTTP/1.1 connections to this origin, so
+// hidden tabs would otherwise starve the visible one's API calls.
+const changeListeners = new Set<ChangeListener>();
+let changeSource: EventSource | null = null;
+let changeSourceOpened = false;
+
+function dispatchChange(e: ChangeEvent) {
+  changeListeners.forEach((listener) => listener(e));
+}
+
+function openChangeSource() {
+  if (changeSource || changeListeners.size === 0 || document.visibilityState === 'hidden') return;
+  const source = new EventSource(`${API_BASE}/api/events`);
+  CHANGE_EVENT_TYPES.forEach((type) => {
+    source.addEventListener(type, (msg) => {
+      dispatchChange({ type, data: JSON.parse((msg as MessageEvent).data) });
+    });
+  });
+  // Any later (re)connect may have missed changes: after a hidden spell or a dropped stream
+  source.addEventListener('open', () => {
+    if (changeSourceOpened) dispatchChange({ type: 'resync', data: null });
+    changeSourceOpened = true;
+  });
+  changeSource = source;
+}
+
+function closeChangeSource() {
+  changeSource?.close();
+  changeSource = null;
+}
+
+function onVisibilityChange() {
+  if (document.visibilityState === 'hidden') closeChangeSource();
+  else openChangeSource();
+}
+
+/** Subscribe to server-pushed changes; returns an unsubscribe function. A 'resync' event
+ * means changes may have been missed and the subscriber should reload. */
+export function subscribeEvents(onEvent: ChangeListener): () => void {
+  if (changeListeners.size === 0) document.addEventListener('visibilitychange', onVisibilityChange);
+  changeListeners.add(onEvent);
+  openChangeSource();
+  return () => {
+    changeListeners.delete(onEvent);
+    if (changeListeners.size === 0) {
+      document.removeEventListener('visibilitychange', onVisibilityChange);
+      closeChangeSource();
+    }
+  };
+}
+
+export type ExportFormat = 'txt' | 'csv' | 'ndjson';
+
 export const api = {
   async getTasks(): Promise<Task[]> {
     const r = await fetch(`${API_BASE}/api/tasks`);
@@ -86,6 +212,22 @@ export const api = {
     if (params?.to_date) sp.set('to_date', params.to_date);
     if (params?.from_datetime) sp.set('from_datetime', params.from_datetime);
     if (params?.to_datetime) sp.set('to_datetime', params.to_datetime);
+    sp.set('all', 'true');
+    const r = await fetch(`${API_BASE}/api/activities?${sp}`);
+    if (!r.ok) throw new Error(await r.text());
+    return r.json();
+  },
+  async getActivitiesPage(params?: {
+    from_date?: string;
+    to_date?: string;
+    limit?: number;
+    cursor?: string;
+  }): Promise<ActivityPage> {
+    const sp = new URLSearchParams();
+    if (params?.from_date) sp.set('from_date', params.from_date);
+    if (params?.to_date) sp.set('to_date', params.to_date);
+    if (params?.limit) sp.set('limit', String(params.limit));
+    if (params?.cursor) sp.set('cursor', params.cursor);
     const q = sp.toString();
     const r = await fetch(`${API_BASE}/api/activities${q ? `?${q}` : ''}`);
     if (!r.ok) throw new Error(await r.text());
@@ -96,6 +238,16 @@ export const api = {
     if (!r.ok) throw new Error(await r.text());
     return r.json();
   },
+  /** Per-day totals bucketed in the browser's time zone. `from`/`to` are local YYYY-MM-DD. */
+  async getActivityHeatmap(from_date: string, to_date: string): Promise<HeatmapDay[]> {
+    const sp = new URLSearchParams({ from_date, to_date });
+    const tz = Intl.DateTimeFormat().resolvedOptions().timeZone;
+    if (tz) sp.set('tz', tz);
+    sp.set('utc_offset', String(-new Date().getTimezoneOffset()));
+    const r = await fetch(`${API_BASE}/api/activities/heatmap?${sp}`);
+    if (!r.ok) throw new Error(await r.text());
+    return r.json();
+  },
   async getStats(from_date?: string, to_date?: string): Promise<StatsByTask[]> {
     const sp = new URLSearchParams();
     if (from_date) sp.set('from_date', from_date);
@@ -112,10 +264,51 @@ export const api = {
     if (!r.ok) throw new Error(await r.text());
     return r.json();
   },
-  async downloadLog(from_date?: string, to_date?: string): Promise<void> {
+  /** Totals per day/week/month/weekday/hour in the browser's time zone, with rolling average and percentiles. */
+  async getStatsAggregate(
+    granularity: AggregateGranularity,
+    params?: { from_date?: string; to_date?: string; task_id?: number; window?: number }
+  ): Promise<AggregateStats> {
+    const sp = new URLSearchParams({ granularity });
+    if (params?.from_date) sp.set('from_date', params.from_date);
+    if (params?.to_date) sp.set('to_date', params.to_date);
+    if (params?.task_id != null) sp.set('task_id', String(params.task_id));
+    if (params?.window) sp.set('window', String(params.window));
+    const tz = Intl.DateTimeFormat().resolvedOptions().timeZone;
+    if (tz) sp.set('tz', tz);
+    sp.set('utc_offset', String(-new Date().getTimezoneOffset()));
+    const r = await fetch(`${API_BASE}/api/activities/stats/aggregate?${sp}`);
+    if (!r.ok) throw new Error(await r.text());
+    return r.json();
+  },
+  /** Several Activity tab views in one request, read from one consistent snapshot. Only the
+   * requested fields are returned. `days_from`/`days_to` are local dates like getActivityHeatmap. */
+  async getDashboard(params: {
+    fields: DashboardField[];
+    from_date?: string;
+    to_date?: string;
+    days_from?: string;
+    days_to?: string;
+    from_datetime?: string;
+    to_datetime?: string;
+  }): Promise<Dashboard> {
+    const { fields, ...rest } = params;
+    const sp = new URLSearchParams({ fields: fields.join(',') });
+    for (const [k, v] of Object.entries(rest)) if (v) sp.set(k, v);
+    if (fields.includes('days')) {
+      const tz = Intl.DateTimeFormat().resolvedOptions().timeZone;
+      if (tz) sp.set('tz', tz);
+      sp.set('utc_offset', String(-new Date().getTimezoneOffset()));
+    }
+    const r = await fetch(`${API_BASE}/api/dashboard?${sp}`);
+    if (!r.ok) throw new Error(await r.text());
+    return r.json();
+  },
+  async downloadLog(from_date?: string, to_date?: string, format: ExportFormat = 'txt'): Promise<void> {
     const sp = new URLSearchParams();
     if (from_date) sp.set('from_date', from_date);
     if (to_date) sp.set('to_date', to_date);
+    if (format !== 'txt') sp.set('format', format);
     const url = `${API_BASE}/api/activities/export${sp.toString() ? `?${sp}` : ''}`;
     const r = await fetch(url);
     if (!r.ok) throw new Error(await r.text());
@@ -124,7 +317,7 @@ export const api = {
     const suffix = now.toISOString().slice(0, 10);
     const a = document.createElement('a');
     a.href = URL.createObjectURL(blob);
-    a.download = `task-log-${suffix}.txt`;
+    a.download = `task-log-${suffix}.${format}`;
     document.body.appendChild(a);
     a.click();
     a.remove();
@@ -139,6 +332,16 @@ export const api = {
     if (!r.ok) throw new Error(await r.text());
     return r.json();
   },
+  /** Stop whatever is running and start taskId, in one transaction. */
+  async switchStopwatch(taskId: number): Promise<{ stopped: Activity | null; started: Activity }> {
+    const r = await fetch(`${API_BASE}/api/activities/switch`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ task_id: taskId }),
+    });
+    if (!r.ok) throw new Error(await r.text());
+    return r.json();
+  },
   async stopActivity(activityId: number): Promise<Activity> {
     const r = await fetch(`${API_BASE}/api/activities/${activityId}`, {
       method: 'PATCH',
@@ -152,6 +355,16 @@ export const api = {
     });
     if (!r.ok) throw new Error(await r.text());
   },
+  /** Delete all activities in a UTC date range and/or of one task; returns how many were deleted. */
+  async deleteActivities(params: { from_date?: string; to_date?: string; task_id?: number }): Promise<number> {
+    const sp = new URLSearchParams();
+    if (params.from_date) sp.set('from_date', params.from_date);
+    if (params.to_date) sp.set('to_date', params.to_date);
+    if (params.task_id != null) sp.set('task_id', String(params.task_id));
+    const r = await fetch(`${API_BASE}/api/activities?${sp}`, { method: 'DELETE' });
+    if (!r.ok) throw new Error(await r.text());
+    return (await r.json()).deleted;
+  },
   async logManual(body: {
     task_id: number;
     start_time?: string;
@@ -1,5 +1,5 @@
-import { useState, useEffect, useCallback } from 'react'
-import { api, type Activity as ActivityType, type StatsByTask, type StatsTimeSeriesPoint } from '../api'
+import { useState, useEffect, useRef } from 'react'
+import { api, subscribeEvents, type Activity as ActivityType, type StatsByTask, type StatsTimeSeriesPoint } from '../api'
 import './Activity.css'
 
 /** API returns naive datetimes in UTC; ensure we parse as UTC so local display is correct. */
@@ -103,6 +103,7 @@ export default function Activity() {
   const [year, setYear] = useState(() => new Date().getFullYear())
   const [month, setMonth] = useState(() => new Date().getMonth() + 1)
   const [daysWithActivity, setDaysWithActivity] = useState<string[]>([])
+  const [minutesByDay, setMinutesByDay] = useState<Record<string, number>>({})
   const [selectedDay, setSelectedDay] = useState<string | null>(null)
   const [dayActivities, setDayActivities] = useState<ActivityType[]>([])
   const [stats, setStats] = useState<StatsByTask[]>([])
@@ -111,35 +112,66 @@ export default function Activity() {
   const [graphType, setGraphType] = useState<'pie' | 'line'>('pie')
   const [loadingDay, setLoadingDay] = useState(false)
   const [deletingId, setDeletingId] = useState<number | null>(null)
+  const [statsVersion, setStatsVersion] = useState(0)
+  const [dayVersion, setDayVersion] = useState(0)
+  // Read by the event subscription, which stays open across day changes
+  const selectedDayRef = useRef(selectedDay)
+  selectedDayRef.current = selectedDay
 
-  const loadDays = useCallback(async () => {
-    try {
-      const startOfMonth = new Date(year, month - 1, 1)
-      const startOfNextMonth = new Date(year, month, 1)
-      const activities = await api.getActivities({
-        from_datetime: startOfMonth.toISOString(),
-        to_datetime: startOfNextMonth.toISOString(),
-      })
-      const localDates = new Set<string>()
-      activities.forEach((a) => {
-        const d = parseUtc(a.logged_at)
-        if (!d) return
-        const y = d.getFullYear()
-        const m = d.getMonth() + 1
-        if (y !== year || m !== month) return
-        const dd = String(d.getDate()).padStart(2, '0')
-        const mm = String(m).padStart(2, '0')
-        localDates.add(`${y}-${mm}-${dd}`)
-      })
-      setDaysWithActivity(Array.from(localDates))
-    } finally {
-      // done
-    }
-  }, [year, month])
-
+  // Apply pushed activity changes to the open day and calendar instead of reloading everything
   useEffect(() => {
-    loadDays()
-  }, [loadDays])
+    const localDate = (iso: string | null): string | null => {
+      const d = parseUtc(iso)
+      if (!d) return null
+      return `${d.getFullYear()}-${String(d.getMonth() + 1).padStart(2, '0')}-${String(d.getDate()).padStart(2, '0')}`
+    }
+    return subscribeEvents((e) => {
+      switch (e.type) {
+        case 'activity.started':
+        case 'activity.stopped':
+        case 'activity.created': {
+          const a = e.data as ActivityType
+          const day = localDate(a.logged_at)
+          if (day && day === selectedDayRef.current) {
+            setDayActivities((prev) =>
+              [a, ...prev.filter((x) => x.id !== a.id)].sort((x, y) => y.logged_at.localeCompare(x.logged_at))
+            )
+          }
+          if (day) setDaysWithActivity((prev) => (prev.includes(day) ? prev : [...prev, day]))
+          setStatsVersion((v) => v + 1)
+          break
+        }
+        case 'activity.deleted':
+          setDayActivities((prev) => prev.filter((x) => x.id !== e.data.id))
+          setStatsVersion((v) => v + 1)
+          break
+        case 'activities.deleted': {
+          // Same test as the server: UTC date of logged_at, and the task if one was given
+          const { from_date, to_date, task_id } = e.data
+          setDayActivities((prev) =>
+            prev.filter((x) => {
+              const day = x.logged_at.slice(0, 10)
+              return !(
+                (task_id == null || x.task_id === task_id) &&
+                (!from_date || day >= from_date) &&
+                (!to_date || day <= to_date)
+              )
+            })
+          )
+          setStatsVersion((v) => v + 1)
+          break
+        }
+        case 'activities.imported':
+        case 'task.deleted':
+          setStatsVersion((v) => v + 1)
+          break
+        case 'resync':
+          setStatsVersion((v) => v + 1)
+          setDayVersion((v) => v + 1)
+          break
+      }
+    })
+  }, [])
 
   useEffect(() => {
     if (!selectedDay) {
@@ -161,7 +193,7 @@ export default function Activity() {
       }
     })
     return () => { cancelled = true }
-  }, [selectedDay])
+  }, [selectedDay, dayVersion])
 
   const statsFromTo = (): { from: string; to: string } => {
     const today = new Date()
@@ -175,10 +207,26 @@ export default function Activity() {
     return { from: from.toISOString().slice(0, 10), to }
   }
 
+  // Calendar (the whole year, so month navigation needs no refetch), stats and chart in one request
   useEffect(() => {
     const { from, to } = statsFromTo()
-    api.getStats(from, to).then(setStats)
-  }, [statsRange])
+    let cancelled = false
+    api.getDashboard({
+      fields: ['days', 'stats', 'time_series'],
+      from_date: from,
+      to_date: to,
+      days_from: `${year}-01-01`,
+      days_to: `${year}-12-31`,
+    }).then((d) => {
+      if (cancelled) return
+      const days = d.days ?? []
+      setDaysWithActivity(days.map((x) => x.date))
+      setMinutesByDay(Object.fromEntries(days.map((x) => [x.date, x.total_minutes])))
+      setStats(d.stats ?? [])
+      setTimeSeries(d.time_series ?? [])
+    })
+    return () => { cancelled = true }
+  }, [year, statsRange, statsVersion])
 
   const handleDownloadLog = async () => {
     const { from, to } = statsFromTo()
@@ -190,11 +238,6 @@ export default function Activity() {
     }
   }
 
-  useEffect(() => {
-    const { from, to } = statsFromTo()
-    api.getStatsTimeSeries(from, to).then(setTimeSeries)
-  }, [statsRange])
-
   const firstDay = new Date(year, month - 1, 1)
   const lastDay = new Date(year, month, 0)
   const startPad = firstDay.getDay()
@@ -219,7 +262,7 @@ export default function Activity() {
     try {
       await api.deleteActivity(activityId)
       setDayActivities((prev) => prev.filter((a) => a.id !== activityId))
-      loadDays()
+      setStatsVersion((v) => v + 1)
     } finally {
       setDeletingId(null)
     }
@@ -272,6 +315,7 @@ export default function Activity() {
               key={dateStr}
               type="button"
               className={`activity-cell ${hasActivity ? 'has-activity' : ''} ${isSelected ? 'selected' : ''}`}
+              title={hasActivity ? formatDuration(minutesByDay[dateStr] ?? 0) : undefined}
               onClick={() => setSelectedDay(isSelected ? null : dateStr)}
             >
               {d}
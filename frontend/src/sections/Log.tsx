@@ -1,5 +1,5 @@
 import { useState, useEffect, useCallback } from 'react'
-import { api, type Task, type RunningActivity } from '../api'
+import { api, subscribeEvents, type Task, type RunningActivity } from '../api'
 import './Log.css'
 
 interface LogProps {
@@ -37,6 +37,42 @@ export default function Log({ onRefresh }: LogProps) {
     load()
   }, [load])
 
+  // Keep running stopwatch and task list in sync with other tabs without re-fetching
+  useEffect(() => {
+    return subscribeEvents((e) => {
+      switch (e.type) {
+        case 'activity.started':
+          setRunning({
+            id: e.data.id,
+            task_id: e.data.task_id,
+            task_name: e.data.task_name,
+            task_color: e.data.task_color,
+            start_time: e.data.start_time,
+          })
+          break
+        case 'activity.stopped':
+        case 'activity.deleted':
+          setRunning((r) => (r && r.id === e.data.id ? null : r))
+          break
+        case 'task.created':
+          setTasks((prev) =>
+            prev.some((t) => t.id === e.data.id)
+              ? prev
+              : [...prev, e.data].sort((a, b) => a.name.localeCompare(b.name))
+          )
+          break
+        case 'task.deleted':
+          setTasks((prev) => prev.filter((t) => t.id !== e.data.id))
+          break
+        case 'activities.imported':
+        case 'activities.deleted':
+        case 'resync':
+          load()
+          break
+      }
+    })
+  }, [load])
+
   const filteredTasks = filter
     ? tasks.filter((t) => t.name.toLowerCase().includes(filter.toLowerCase()))
     : tasks
@@ -53,6 +89,18 @@ export default function Log({ onRefresh }: LogProps) {
     }
   }
 
+  const handleSwitchStopwatch = async () => {
+    if (!selectedTaskId) return
+    try {
+      setError(null)
+      await api.switchStopwatch(selectedTaskId)
+      await load()
+      onRefresh?.()
+    } catch (e) {
+      setError(e instanceof Error ? e.message : String(e))
+    }
+  }
+
   const handleStopRunning = async () => {
     if (!running) return
     try {
@@ -177,10 +225,10 @@ export default function Log({ onRefresh }: LogProps) {
         <div className="log-stopwatch">
           <button
             type="button"
-            onClick={handleStartStopwatch}
-            disabled={!selectedTaskId || !!running}
+            onClick={running ? handleSwitchStopwatch : handleStartStopwatch}
+            disabled={!selectedTaskId || running?.task_id === selectedTaskId}
           >
-            Start stopwatch
+            {running ? 'Switch to this task' : 'Start stopwatch'}
           </button>
         </div>
       )}
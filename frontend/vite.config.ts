@@ -7,6 +7,7 @@ export default defineConfig({
     port: 5173,
     proxy: {
       '/api': { target: 'http://localhost:8765', changeOrigin: true },
+      '^/t/[^/]+/api': { target: 'http://localhost:8765', changeOrigin: true },
     },
   },
 })
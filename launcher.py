@@ -2,12 +2,22 @@
 Task Logger launcher: starts FastAPI server in a subprocess, system tray icon, and global hotkey.
 On hotkey or tray "Open", opens the default browser to the app.
 Run from anywhere: python C:\...\task_logger\launcher.py
+With --in-process (or TASK_LOGGER_IN_PROCESS=1) the server runs in a thread of this process
+instead, so only one interpreter stays resident.
 """
 import os
+import sqlite3
 import subprocess
 import sys
+import threading
+import time
+import urllib.error
+import urllib.request
 import webbrowser
+from contextlib import closing
+from datetime import datetime
 from pathlib import Path
+from typing import Optional
 
 # Project root (works when run as: python C:\path\to\launcher.py)
 ROOT = Path(__file__).resolve().parent
@@ -15,11 +25,18 @@ os.chdir(ROOT)
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
+from backend.paths import DATA_DIR, DB_PATH
+
 PORT = 8765
 URL = f"http://localhost:{PORT}"
+HEALTH_URL = f"http://127.0.0.1:{PORT}/api/health"
+READY_TIMEOUT_SECONDS = 30.0
 
 # Server subprocess (so it binds reliably when run with pythonw)
 _server_process = None
+# In-process mode: uvicorn.Server and the thread running it
+_server = None
+_server_thread = None
 
 
 def open_app() -> None:
@@ -52,20 +69,96 @@ def stop_server_process() -> None:
         _server_process = None
 
 
+def start_server_thread() -> None:
+    """Run uvicorn in a daemon thread of this process. The app (and its engine) is imported
+    inside the thread so the tray and hotkey come up without waiting for it."""
+    global _server, _server_thread
+    # pythonw has no console; uvicorn's log formatter needs real streams
+    if sys.stdout is None or sys.stderr is None:
+        sys.stdout = sys.stderr = open(os.devnull, "w")
+
+    def serve() -> None:
+        global _server
+        import uvicorn
+        from backend.main import app
+
+        # Open /api/events streams would otherwise hold shutdown until the browser disconnects
+        config = uvicorn.Config(app, host="127.0.0.1", port=PORT, log_level="info", timeout_graceful_shutdown=3)
+        _server = uvicorn.Server(config)
+        # Signal handlers are only installed from the main thread, so Quit drives shutdown
+        _server.run()
+
+    _server_thread = threading.Thread(target=serve, name="uvicorn", daemon=True)
+    _server_thread.start()
+
+
+def stop_server_thread() -> None:
+    """Ask uvicorn to finish in-flight requests and run lifespan shutdown, then wait for it."""
+    global _server, _server_thread
+    if _server is not None:
+        _server.should_exit = True
+    if _server_thread is not None:
+        _server_thread.join(timeout=5)
+    _server = _server_thread = None
+
+
+def stop_server() -> None:
+    stop_server_thread()
+    stop_server_process()
+
+
+def server_alive() -> bool:
+    if _server_thread is not None:
+        return _server_thread.is_alive()
+    return _server_process is not None and _server_process.poll() is None
+
+
+def wait_until_ready(started: float, timeout: float = READY_TIMEOUT_SECONDS) -> Optional[float]:
+    """Poll /api/health with exponential backoff. Returns seconds from `started` (a
+    perf_counter value) to the first successful response, or None on timeout or if the
+    server exits."""
+    delay = 0.02
+    deadline = started + timeout
+    while time.perf_counter() < deadline:
+        if not server_alive():
+            return None
+        try:
+            with urllib.request.urlopen(HEALTH_URL, timeout=1.0) as r:
+                if r.status == 200:
+                    return time.perf_counter() - started
+        except (urllib.error.URLError, OSError):
+            pass
+        time.sleep(delay)
+        delay = min(delay * 1.5, 0.5)
+    return None
+
+
+def report_startup(seconds: Optional[float], mode: str) -> None:
+    """Print time to first response and append it to data/startup.log for tracking."""
+    if seconds is None:
+        print("Server did not become ready")
+    else:
+        print(f"Server ready in {seconds * 1000:.0f} ms")
+    result = f"{seconds:.3f}" if seconds is not None else "timeout"
+    line = f"{datetime.now().isoformat(timespec='seconds')}\t{mode}\t{result}"
+    try:
+        DATA_DIR.mkdir(parents=True, exist_ok=True)
+        with open(DATA_DIR / "startup.log", "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+    except OSError:
+        pass
+
+
 def get_hotkey_from_db() -> str:
-    """Read hotkey from SQLite settings so we don't need the API to be up."""
+    """Read hotkey from SQLite settings so we don't need the API to be up. Uses the sqlite3
+    module directly (read-only) so the launcher never loads SQLAlchemy."""
     try:
-        from backend.database import SessionLocal, init_db
-        from backend.models import Setting
-        init_db()
-        db = SessionLocal()
-        try:
-            row = db.query(Setting).filter(Setting.key == "hotkey").first()
-            if row and row.value:
-                return row.value.strip().lower()
-        finally:
-            db.close()
-    except Exception:
+        uri = DB_PATH.resolve().as_uri() + "?mode=ro"
+        with closing(sqlite3.connect(uri, uri=True)) as conn:
+            row = conn.execute("SELECT value FROM settings WHERE key = 'hotkey'").fetchone()
+        if row and row[0]:
+            return row[0].strip().lower()
+    except sqlite3.Error:
         pass
     return "ctrl+alt+shift+l"
 
@@ -119,7 +212,7 @@ def run_tray_and_hotkey() -> None:
     img = Image.new("RGBA", (16, 16), (0x22, 0x22, 0x22, 255))
     try:
         def on_quit(icon):
-            stop_server_process()
+            stop_server()
             icon.stop()
 
         icon = pystray.Icon(
@@ -136,19 +229,28 @@ def run_tray_and_hotkey() -> None:
         # If tray fails (e.g. headless), just keep hotkey listener and server running
         try:
             while True:
-                import time
                 time.sleep(60)
         except KeyboardInterrupt:
-            pass
+            stop_server()
 
 
 def main() -> None:
-    import time
     open_browser_on_start = "--open" in sys.argv
-    start_server_process()
-    time.sleep(2.0)
-    if open_browser_on_start:
-        open_app()
+    in_process = "--in-process" in sys.argv or os.environ.get("TASK_LOGGER_IN_PROCESS") == "1"
+    started = time.perf_counter()
+    if in_process:
+        start_server_thread()
+    else:
+        start_server_process()
+
+    def on_ready() -> None:
+        seconds = wait_until_ready(started)
+        report_startup(seconds, "in-process" if in_process else "subprocess")
+        if seconds is not None and open_browser_on_start:
+            open_app()
+
+    # Tray and hotkey come up while the server is still starting
+    threading.Thread(target=on_ready, name="wait-for-server", daemon=True).start()
     run_tray_and_hotkey()
 
 
@@ -0,0 +1,19 @@
+"""Shared test setup. The data directory is chosen when backend.paths is imported, so it
+is pointed at a throwaway directory before any backend module loads."""
+import os
+import tempfile
+
+import pytest
+
+os.environ["TASK_LOGGER_DATA"] = tempfile.mkdtemp(prefix="task-logger-tests-")
+
+
+@pytest.fixture(scope="session")
+def client():
+    """TestClient with the app's lifespan entered (schema created, writer running)."""
+    from fastapi.testclient import TestClient
+
+    from backend.main import app
+
+    with TestClient(app) as c:
+        yield c
@@ -0,0 +1,22 @@
+"""Bulk deletes remove the matching activities even when the daily rollup has drifted."""
+from backend.database import database
+
+DAY = "2033-05-01"
+
+
+def test_bulk_delete_ignores_a_missing_rollup(client):
+    csv = "task,duration_minutes,logged_at\n" + "".join(
+        f"Drifted rollup,{10 + i},{DAY}T0{i}:00:00\n" for i in range(3)
+    )
+    r = client.post("/api/activities/bulk", content=csv, headers={"content-type": "text/csv"})
+    assert r.status_code == 200 and r.json()["imported"] == 3
+    with database.engine.begin() as conn:
+        assert conn.exec_driver_sql("DELETE FROM daily_task_totals WHERE day = ?", (DAY,)).rowcount == 1
+
+    r = client.delete(f"/api/activities?from_date={DAY}&to_date={DAY}")
+    assert r.status_code == 200 and r.json() == {"deleted": 3}
+    with database.engine.connect() as conn:
+        left = conn.exec_driver_sql(
+            "SELECT COUNT(*) FROM activities WHERE date(logged_at) = ?", (DAY,)
+        ).scalar()
+    assert left == 0
@@ -0,0 +1,70 @@
+"""The fast JSON path (TASK_LOGGER_FAST_JSON=1) returns byte-for-byte the same bodies as
+the pydantic response models, with orjson and with the stdlib json fallback."""
+import pytest
+
+from backend.services import fast_json
+from backend.services.stats_cache import stats_cache
+
+FROM, TO = "2032-02-01", "2032-02-03"
+
+URLS = [
+    f"/api/activities?from_date={FROM}&to_date={TO}&limit=3",
+    f"/api/activities?from_date={FROM}&to_date={TO}&all=true",
+    f"/api/activities/stats?from_date={FROM}&to_date={TO}",
+    f"/api/activities/stats/time_series?from_date={FROM}&to_date={TO}",
+]
+
+
+@pytest.fixture(scope="module", autouse=True)
+def activities(client):
+    ids = {}
+    for name in ("Café ☕", "日本語のタスク", 'Quote " and \\ backslash'):
+        r = client.post("/api/tasks", json={"name": name})
+        assert r.status_code == 200
+        ids[name] = r.json()["id"]
+    cafe, japanese, quoted = ids.values()
+    for body in (
+        # Microseconds, no timezone (read as UTC)
+        {"task_id": cafe, "start_time": "2032-02-01T08:00:00.123456", "end_time": "2032-02-01T08:20:00.5",
+         "logged_at": "2032-02-01T08:00:00.123456"},
+        # Offset timezone, stored as UTC
+        {"task_id": japanese, "start_time": "2032-02-02T09:15:00+02:00", "end_time": "2032-02-02T10:00:00+02:00",
+         "logged_at": "2032-02-02T09:15:00+02:00"},
+        # No time assigned: display_time set, start/end null
+        {"task_id": quoted, "duration_minutes": 7, "logged_at": "2032-02-03T00:00:00Z"},
+        {"task_id": quoted, "duration_minutes": 13, "logged_at": "2032-02-03T17:45:30.000001Z"},
+        {"task_id": cafe, "duration_minutes": 1, "logged_at": "2032-02-03T23:59:59.999999"},
+    ):
+        r = client.post("/api/activities/manual", json=body)
+        assert r.status_code == 200, r.text
+
+
+def _bodies(client, url: str) -> list[bytes]:
+    """The body of `url` and, for paged lists, of every following page."""
+    bodies = []
+    while True:
+        stats_cache.clear()  # cached entries are encoded for one path only
+        r = client.get(url)
+        assert r.status_code == 200, r.text
+        bodies.append(r.content)
+        next_cursor = r.json().get("next_cursor") if url.startswith("/api/activities?") and "all=" not in url else None
+        if not next_cursor:
+            return bodies
+        url = f"{url.split('&cursor=')[0]}&cursor={next_cursor}"
+
+
+@pytest.mark.parametrize("encoder", ["orjson", "stdlib"])
+@pytest.mark.parametrize("url", URLS)
+def test_fast_path_matches_models(client, monkeypatch, encoder, url):
+    if encoder == "orjson":
+        if fast_json.orjson is None:
+            pytest.skip("orjson is not installed")
+    else:
+        monkeypatch.setattr(fast_json, "orjson", None)
+    monkeypatch.setattr(fast_json, "FAST_JSON", True)
+    fast = _bodies(client, url)
+    monkeypatch.setattr(fast_json, "FAST_JSON", False)
+    models = _bodies(client, url)
+    if "limit=3" in url:
+        assert len(fast) == 2  # five activities: the cursor is exercised too
+    assert fast == models
@@ -0,0 +1,167 @@
+"""Upgrading databases written by earlier versions of the app."""
+import sqlite3
+
+import pytest
+
+from sqlalchemy import event
+
+from backend.database import Database, init_db
+from backend.migrations import SCHEMA_VERSION, get_schema_version
+from backend.services.color import allocate_task_colors, next_task_color
+
+# The schema create_all produced before versioned migrations existed (user_version 0)
+BASELINE_SCHEMA = """
+CREATE TABLE tasks (
+    id INTEGER NOT NULL, name VARCHAR(255) NOT NULL, color VARCHAR(20) NOT NULL,
+    created_at DATETIME, PRIMARY KEY (id), UNIQUE (name)
+);
+CREATE TABLE activities (
+    id INTEGER NOT NULL, task_id INTEGER NOT NULL, start_time DATETIME, end_time DATETIME,
+    duration_minutes INTEGER NOT NULL, logged_at DATETIME NOT NULL,
+    no_time_assigned BOOLEAN NOT NULL, display_time DATETIME,
+    PRIMARY KEY (id), FOREIGN KEY(task_id) REFERENCES tasks (id)
+);
+CREATE TABLE settings (key VARCHAR(64) NOT NULL, value VARCHAR(512), PRIMARY KEY (key));
+"""
+
+
+def _baseline(path, rows: str) -> None:
+    conn = sqlite3.connect(path)
+    conn.executescript(BASELINE_SCHEMA + rows)
+    conn.commit()
+    conn.close()
+
+
+def _upgrade(path):
+    db = Database.open(path)
+    init_db(db.engine)
+    return db
+
+
+def test_upgrade_baseline_with_orphaned_activity(tmp_path):
+    path = tmp_path / "baseline.db"
+    _baseline(path, """
+        INSERT INTO tasks (id, name, color) VALUES (1, 'Kept', '#e54444');
+        INSERT INTO activities (task_id, start_time, end_time, duration_minutes, logged_at, no_time_assigned)
+            VALUES (1, '2025-03-01 09:00:00', '2025-03-01 09:30:00', 30, '2025-03-01 09:00:00', 0);
+        -- Task 2 was deleted while foreign keys were not enforced
+        INSERT INTO activities (task_id, start_time, end_time, duration_minutes, logged_at, no_time_assigned)
+            VALUES (2, '2025-03-01 10:00:00', '2025-03-01 10:45:00', 45, '2025-03-01 10:00:00', 0);
+    """)
+    db = _upgrade(path)
+    try:
+        with db.engine.connect() as conn:
+            assert conn.exec_driver_sql("PRAGMA user_version").scalar() == SCHEMA_VERSION
+            assert conn.exec_driver_sql("PRAGMA foreign_keys").scalar() == 1
+            assert conn.exec_driver_sql("PRAGMA foreign_key_check").all() == []
+            assert conn.exec_driver_sql("SELECT task_id, duration_minutes FROM activities").all() == [(1, 30)]
+            totals = conn.exec_driver_sql(
+                "SELECT day, task_id, total_minutes, activity_count FROM daily_task_totals"
+            ).all()
+            assert totals == [("2025-03-01", 1, 30, 1)]
+    finally:
+        db.engine.dispose()
+
+
+def _fail_before(engine, prefix: str):
+    """Make the next statement starting with `prefix` raise, as a crash at that point would."""
+    def fail(conn, cursor, statement, *args):
+        if statement.lstrip().startswith(prefix):
+            raise RuntimeError(f"interrupted before {prefix}")
+    event.listen(engine, "before_cursor_execute", fail)
+    return lambda: event.remove(engine, "before_cursor_execute", fail)
+
+
+def test_failed_migration_rolls_back_with_its_version(tmp_path):
+    path = tmp_path / "baseline.db"
+    _baseline(path, """
+        INSERT INTO tasks (id, name, color) VALUES (1, 'Kept', '#e54444');
+        INSERT INTO activities (task_id, start_time, end_time, duration_minutes, logged_at, no_time_assigned)
+            VALUES (1, '2025-03-01 09:00:00', '2025-03-01 09:30:00', 30, '2025-03-01 09:00:00', 0);
+    """)
+    db = Database.open(path)
+    try:
+        # m004 has created activities_new, copied into it and dropped activities by then
+        restore = _fail_before(db.engine, "ALTER TABLE activities_new")
+        with pytest.raises(Exception, match="interrupted"):
+            init_db(db.engine)
+        restore()
+        with db.engine.connect() as conn:
+            assert get_schema_version(conn) == 3
+            tables = conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'table'").scalars().all()
+            assert "activities" in tables and "activities_new" not in tables
+            assert conn.exec_driver_sql("SELECT task_id, duration_minutes FROM activities").all() == [(1, 30)]
+        init_db(db.engine)
+        with db.engine.connect() as conn:
+            assert get_schema_version(conn) == SCHEMA_VERSION
+    finally:
+        db.engine.dispose()
+
+
+def test_interrupted_cascade_rebuild_can_be_rerun(tmp_path):
+    path = tmp_path / "baseline.db"
+    _baseline(path, """
+        INSERT INTO tasks (id, name, color) VALUES (1, 'Kept', '#e54444');
+        INSERT INTO activities (task_id, start_time, end_time, duration_minutes, logged_at, no_time_assigned)
+            VALUES (1, '2025-03-01 09:00:00', '2025-03-01 09:30:00', 30, '2025-03-01 09:00:00', 0);
+        -- What a crash mid-m004 left behind when each DDL statement committed on its own
+        CREATE TABLE activities_new (id INTEGER NOT NULL, PRIMARY KEY (id));
+    """)
+    db = Database.open(path)
+    try:
+        restore = _fail_before(db.engine, "DROP TABLE activities")
+        with pytest.raises(Exception, match="interrupted"):
+            init_db(db.engine)
+        restore()
+        init_db(db.engine)
+        with db.engine.connect() as conn:
+            assert get_schema_version(conn) == SCHEMA_VERSION
+            tables = conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'table'").scalars().all()
+            assert "activities_new" not in tables
+            assert conn.exec_driver_sql("SELECT task_id, duration_minutes FROM activities").all() == [(1, 30)]
+            on_delete = {fk.on_delete for fk in conn.exec_driver_sql("PRAGMA foreign_key_list(activities)")}
+            assert on_delete == {"CASCADE"}
+    finally:
+        db.engine.dispose()
+
+
+def test_upgrade_closes_stale_stopwatches_at_zero_minutes(tmp_path):
+    path = tmp_path / "baseline.db"
+    _baseline(path, """
+        INSERT INTO tasks (id, name, color) VALUES (1, 'Kept', '#e54444');
+        INSERT INTO activities (id, task_id, start_time, end_time, duration_minutes, logged_at, no_time_assigned)
+            VALUES (1, 1, '2024-01-01 09:00:00', NULL, 0, '2024-01-01 09:00:00', 0),
+                   (2, 1, NULL, NULL, 0, '2024-02-01 09:00:00', 0),
+                   (3, 1, '2025-10-20 08:00:00', NULL, 0, '2025-10-20 08:00:00', 0);
+    """)
+    db = _upgrade(path)
+    try:
+        with db.engine.connect() as conn:
+            rows = conn.exec_driver_sql(
+                "SELECT id, end_time, duration_minutes FROM activities ORDER BY id"
+            ).all()
+            # Stale stopwatches get no invented time; the newest one keeps running
+            assert rows == [
+                (1, "2024-01-01 09:00:00", 0),
+                (2, "2024-02-01 09:00:00", 0),
+                (3, None, 0),
+            ]
+    finally:
+        db.engine.dispose()
+
+
+def test_color_cursor_seeded_from_task_count(tmp_path):
+    path = tmp_path / "baseline.db"
+    _baseline(path, """
+        INSERT INTO tasks (id, name, color) VALUES (1, 'A', '#e54444'), (2, 'B', '#c5e544'), (5, 'C', '#44e585');
+    """)
+    db = _upgrade(path)
+    statements = []
+    event.listen(db.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    try:
+        with db.session_factory() as session:
+            assert allocate_task_colors(session, 2) == [next_task_color(3), next_task_color(4)]
+        # One upsert; the tasks table is not read
+        assert len(statements) == 1 and "tasks" not in statements[0]
+    finally:
+        db.engine.dispose()
@@ -0,0 +1,59 @@
+"""List and export endpoints issue a fixed number of SQL statements, however many rows
+they return (no per-row task lookups)."""
+import pytest
+from sqlalchemy import event
+
+from backend.database import database
+
+
+def _import(client, task: str, day: str, rows: int) -> None:
+    csv = "task,duration_minutes,logged_at\n" + "".join(
+        f"{task},{i % 50 + 1},{day}T{i // 60 % 24:02d}:{i % 60:02d}:00\n" for i in range(rows)
+    )
+    r = client.post("/api/activities/bulk", content=csv, headers={"content-type": "text/csv"})
+    assert r.status_code == 200 and r.json()["imported"] == rows
+
+
+def _count_statements(client, url: str) -> int:
+    count = 0
+
+    def on_execute(*args) -> None:
+        nonlocal count
+        count += 1
+
+    engines = (database.engine, database.async_engine.sync_engine)
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", on_execute)
+    try:
+        r = client.get(url)
+    finally:
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", on_execute)
+    assert r.status_code == 200
+    return count
+
+
+FEW_DAY, MANY_DAY = "2031-01-01", "2031-01-02"
+
+
+@pytest.fixture(scope="module", autouse=True)
+def seeded(client):
+    # Several tasks on the busy day, so a per-row task lookup cannot hide behind one cached task
+    for n, task in enumerate(("Query count A", "Query count B", "Query count C")):
+        _import(client, task, MANY_DAY, 100 + n)
+    _import(client, "Query count A", FEW_DAY, 2)
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "/api/activities?from_date={day}&to_date={day}",
+        "/api/activities?from_date={day}&to_date={day}&all=true",
+        "/api/activities/export?from_date={day}&to_date={day}&format=txt",
+        "/api/activities/export?from_date={day}&to_date={day}&format=csv",
+    ],
+)
+def test_statements_do_not_grow_with_rows(client, url):
+    few = _count_statements(client, url.format(day=FEW_DAY))
+    many = _count_statements(client, url.format(day=MANY_DAY))
+    assert few == many
@@ -0,0 +1,23 @@
+import pytest
+
+from backend.services.static_assets import _accepted_encodings
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, br", {"gzip", "br"}),
+    ("gzip;q=0.5, br;q=0", {"gzip"}),
+    ("gzip; q=0.0, br;q=1", {"br"}),
+    ("gzip;level=1;q=0, br", {"br"}),
+    # An unparseable q-value counts as 0 instead of failing the request
+    ("gzip;q=x, br", {"br"}),
+    ("gzip;q=, br;q=nan, identity", {"identity"}),
+    # "*" accepts every encoding not listed on its own, at its q-value
+    ("*", {"br", "gzip"}),
+    ("identity, *;q=0.5", {"identity", "br", "gzip"}),
+    ("*;q=0", set()),
+    ("*, gzip;q=0", {"br"}),
+    ("br;q=0, *;q=0.1", {"gzip"}),
+    ("gzip, *;q=0", {"gzip"}),
+])
+def test_accepted_encodings(header, expected):
+    assert _accepted_encodings(header) == expected
@@ -0,0 +1,36 @@
+import anyio
+import pytest
+from fastapi.testclient import TestClient
+from starlette.responses import PlainTextResponse
+
+from backend.services.tenants import TENANT_HEADER, TenantMiddleware, TenantRegistry, current_tenant
+
+
+async def _tenant_name(scope, receive, send):
+    await PlainTextResponse(current_tenant().name)(scope, receive, send)
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return TenantRegistry(root=tmp_path)
+
+
+@pytest.mark.parametrize("name", ["con", "nul", "aux", "prn", "com1", "com9", "lpt0", "lpt3"])
+def test_windows_device_names_are_rejected(registry, name):
+    client = TestClient(TenantMiddleware(_tenant_name, registry))
+    for response in (
+        client.get("/api/tasks", headers={TENANT_HEADER: name}),
+        client.get(f"/t/{name}/api/tasks"),
+    ):
+        assert response.status_code == 400
+    assert len(registry) == 0 and not list(registry.root.iterdir())
+
+
+def test_names_that_only_start_like_a_device_are_allowed(registry):
+    client = TestClient(TenantMiddleware(_tenant_name, registry))
+    try:
+        response = client.get("/t/console/api/tasks")
+        assert response.status_code == 200 and response.text == "console"
+        assert (registry.root / "console.db").is_file()
+    finally:
+        anyio.run(registry.close_all)
@@ -0,0 +1,25 @@
+import pytest
+from sqlalchemy import text
+
+from backend.database import Database
+from backend.services.writer import Writer
+
+
+def test_writer_survives_a_batch_that_cannot_open_a_session(tmp_path):
+    db = Database.open(tmp_path / "writer.db")
+    failures = [RuntimeError("session unavailable")]
+
+    def flaky_session_factory():
+        if failures:
+            raise failures.pop()
+        return db.session_factory()
+
+    writer = Writer(flaky_session_factory)
+    try:
+        with pytest.raises(RuntimeError, match="session unavailable"):
+            writer.submit(lambda s: s.execute(text("SELECT 1")).scalar()).result(timeout=5)
+        # The same thread keeps serving later writes
+        assert writer.submit(lambda s: s.execute(text("SELECT 2")).scalar()).result(timeout=5) == 2
+    finally:
+        writer.stop()
+        db.engine.dispose()